@@ -0,0 +1,63 @@
+# Compares packing a device's 24 solenoid states into polarized port bytes with integer bitmasks
+# against the previous per-pin packing, and checks that both give the same bytes for every pin
+# pattern and polarity. Run from the repository root:
+#   python -m Benchmarks.PackingBenchmark
+import itertools
+import random
+import sys
+import timeit
+
+from Data.Rig import PackPorts
+
+
+# The per-pin packing that Device.SetSolenoids used before the bitmask packing.
+def LegacyConvertPinStatesToBytes(state):
+    number = 0
+    for i in range(8):
+        if state[i]:
+            number += 1 << i
+    return bytes([number])
+
+
+def LegacyPackDevice(solenoidStates, polarities):
+    portStates = []
+    for port in range(3):
+        polarizedStates = [state != polarities[int(i / 8)] for i, state in
+                           enumerate(solenoidStates[port * 8:port * 8 + 8], port * 8)]
+        portStates.append(LegacyConvertPinStatesToBytes(polarizedStates)[0])
+    return portStates
+
+
+def PackDevice(bank, polarities):
+    packedPorts = PackPorts(bank)
+    return [packedPorts[port] ^ (0xFF if polarities[port] else 0) for port in range(3)]
+
+
+def Check():
+    for pins, polarity in itertools.product(itertools.product([False, True], repeat=8),
+                                            [False, True]):
+        states = list(pins) * 3
+        polarities = [polarity, not polarity, polarity]
+        if LegacyPackDevice(states, polarities) != PackDevice(bytes(states), polarities):
+            raise Exception("Packing mismatch for pins %s with polarities %s." %
+                            (pins, polarities))
+
+
+def Main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    Check()
+    print("All 256 pin patterns pack identically with both polarities.")
+
+    states = [random.random() < 0.5 for _ in range(24)]
+    bank = memoryview(bytes(states))
+    polarities = [False, True, False]
+    legacyTime = timeit.timeit(lambda: LegacyPackDevice(states, polarities), number=repeats)
+    packedTime = timeit.timeit(lambda: PackDevice(bank, polarities), number=repeats)
+    print("%12s %16s" % ("Mode", "us/device"))
+    print("%12s %16.3f" % ("per-pin", legacyTime / repeats * 1e6))
+    print("%12s %16.3f" % ("bitmask", packedTime / repeats * 1e6))
+    print("Speedup: %.2fx" % (legacyTime / packedTime))
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,65 @@
+# Measures the end-to-end latency and throughput of rig flushes against simulated boards: the time
+# from a flush starting to every board having decoded its new pin states, with the serial links
+# limited to 115200 baud. A second run stalls one board's writes now and then, to check that the
+# other boards are not held up by it. Run from the repository root:
+#   python -m Benchmarks.RigSimulationBenchmark [flushCount]
+import statistics
+import sys
+
+from Data.Scheduler import Now
+from Data.SimulatedDevice import SimulatedRig
+
+BAUD_RATE = 115200
+STALL_DURATION = 0.05
+STALL_INTERVAL = 10
+
+
+def Measure(boardCount: int, flushCount: int, stallBoard: bool):
+    rig = SimulatedRig(boardCount, BAUD_RATE)
+    numbers = range(boardCount * 24)
+    flushTimes = []
+    latencies = []
+    start = Now()
+    for i in range(flushCount):
+        # Toggle every solenoid so that all three ports of every board must be sent.
+        state = i % 2 == 0
+        pins = 0xFFFFFF if state else 0
+        if stallBoard and i % STALL_INTERVAL == 0:
+            rig.allDevices[0].serialPort.InjectStall(STALL_DURATION)
+        rig.SetSolenoidStates({n: state for n in numbers})
+        flushStart = Now()
+        rig.FlushStates()
+        flushTimes.append(Now() - flushStart)
+        # A stalled board is left to catch up, and only the other boards are timed.
+        devices = rig.allDevices[1:] if stallBoard else rig.allDevices
+        arrivals = [d.serialPort.WaitForPins(pins, 1.0) for d in devices]
+        if None in arrivals:
+            raise Exception("A simulated board did not receive its states within a second.")
+        latencies.append(max(arrivals) - flushStart)
+    elapsed = Now() - start
+    rig.Disconnect()
+    return flushTimes, latencies, flushCount / elapsed
+
+
+def Percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def Main():
+    flushCount = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print("%8s %10s %14s %16s %16s %16s" % ("Boards", "Stall", "Flush us", "Latency us",
+                                              "p99 latency us", "Flushes/s"))
+    for stallBoard in (False, True):
+        for boardCount in (1, 4, 16):
+            if stallBoard and boardCount == 1:
+                continue
+            flushTimes, latencies, throughput = Measure(boardCount, flushCount, stallBoard)
+            print("%8d %10s %14.1f %16.1f %16.1f %16.1f" % (
+                boardCount, "board 0" if stallBoard else "none",
+                statistics.mean(flushTimes) * 1e6, statistics.median(latencies) * 1e6,
+                Percentile(latencies, 0.99) * 1e6, throughput))
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,169 @@
+# Headless benchmarks for the script runtime, driving Data.ProgramCompilation directly with no Qt.
+# Covers Recompile throughput, CallFunction and TickFunction overhead with 1-1000 concurrently
+# running functions, Parameter.Get for valve and list parameters, and FindValve on chips with
+# 10-5000 valves. The results are written as JSON so that regressions can be tracked. Run from
+# the repository root:
+#   python -m Benchmarks.RuntimeBenchmark [output.json]
+import datetime
+import json
+import platform
+import sys
+import timeit
+
+import Data.ProgramCompilation as ProgramCompilation
+from Data.Chip import Chip, Program, Script, Valve
+from Data.Rig import Rig
+from Data.Scheduler import Scheduler
+
+FUNCTION_COUNTS = [1, 10, 100, 1000]
+VALVE_COUNTS = [10, 100, 1000, 5000]
+LIST_LENGTHS = [1, 10, 100]
+
+PUMP_SCRIPT = open("Builtins/Pump.py").read()
+
+PARAMETER_SCRIPT = """
+valve = Parameter(Valve)
+valves = ListParameter(Valve)
+"""
+
+FIND_SCRIPT = """
+def Find(name):
+    return FindValve(name)
+
+
+def FindOrNone(name):
+    try:
+        return FindValve(name)
+    except Exception:
+        return None
+"""
+
+
+def BuildChip(valveCount: int) -> Chip:
+    chip = Chip()
+    for i in range(valveCount):
+        valve = Valve()
+        valve.name = "Valve %d" % i
+        valve.solenoidNumber = i % 1000
+        chip.valves.append(valve)
+    chip.InvalidateLookup()
+    return chip
+
+
+def Compile(source: str, chip: Chip, rig: Rig) -> ProgramCompilation.CompiledProgram:
+    program = Program(Script(None, True, source, "Benchmark"))
+    compiledPrograms = []
+    compiledProgram = ProgramCompilation.CompiledProgram(program)
+    compiledPrograms.append(compiledProgram)
+    ProgramCompilation.Recompile(compiledProgram, chip, rig, compiledPrograms)
+    if len(compiledProgram.messages) > 0:
+        raise Exception("Benchmark script did not compile: " + compiledProgram.messages[0].text)
+    return compiledProgram
+
+
+# Times [function] and returns the mean time per call in microseconds.
+def TimePerCall(function, number: int) -> float:
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1e6
+
+
+def BenchmarkRecompile(chip: Chip, rig: Rig):
+    compiledProgram = Compile(PUMP_SCRIPT, chip, rig)
+    compiledPrograms = [compiledProgram]
+    perCall = TimePerCall(lambda: ProgramCompilation.Recompile(compiledProgram, chip, rig,
+                                                               compiledPrograms), 200)
+    return [Result("Recompile", {"script": "Pump"}, perCall, "us/call"),
+            Result("Recompile throughput", {"script": "Pump"}, 1e6 / perCall, "recompiles/s")]
+
+
+def BenchmarkFunctions(chip: Chip, rig: Rig):
+    results = []
+    for functionCount in FUNCTION_COUNTS:
+        source = "".join("def F%d():\n    while True:\n        yield\n\n" % i for i in
+                         range(functionCount))
+        compiledProgram = Compile(source, chip, rig)
+        symbols = ["F%d" % i for i in range(functionCount)]
+
+        def CallAll():
+            for symbol in symbols:
+                ProgramCompilation.CallFunction(compiledProgram, symbol)
+            compiledProgram.asyncFunctions.clear()
+
+        callTime = TimePerCall(CallAll, max(1, 2000 // functionCount)) / functionCount
+
+        CallAll()
+        for symbol in symbols:
+            ProgramCompilation.CallFunction(compiledProgram, symbol)
+        tickTime = [0.0]
+
+        def TickAll():
+            # Far enough in the future that every function is due.
+            tickTime[0] += 1.0
+            for symbol in symbols:
+                ProgramCompilation.TickFunction(compiledProgram, tickTime[0], symbol)
+
+        perTick = TimePerCall(TickAll, max(1, 5000 // functionCount)) / functionCount
+        Scheduler.Instance().UnscheduleProgram(compiledProgram)
+
+        parameters = {"functions": functionCount}
+        results += [Result("CallFunction", parameters, callTime, "us/call"),
+                    Result("TickFunction", parameters, perTick, "us/tick")]
+    return results
+
+
+def BenchmarkParameters(chip: Chip, rig: Rig):
+    compiledProgram = Compile(PARAMETER_SCRIPT, chip, rig)
+    compiledProgram.program.parameterValues["valve"] = chip.valves[0]
+    valveParameter = compiledProgram.parameters["valve"]
+    results = [Result("Parameter.Get", {"type": "Valve"},
+                      TimePerCall(valveParameter.Get, 20000), "us/call")]
+    listParameter = compiledProgram.parameters["valves"]
+    for length in LIST_LENGTHS:
+        compiledProgram.program.parameterValues["valves"] = chip.valves[:length]
+        results.append(Result("Parameter.Get", {"type": "List(Valve)", "length": length},
+                              TimePerCall(listParameter.Get, max(100, 20000 // length)),
+                              "us/call"))
+    return results
+
+
+def BenchmarkFindValve(rig: Rig):
+    results = []
+    for valveCount in VALVE_COUNTS:
+        chip = BuildChip(valveCount)
+        functions = Compile(FIND_SCRIPT, chip, rig).programFunctions
+        find = functions["Find"].function
+        findOrNone = functions["FindOrNone"].function
+        lastName = "Valve %d" % (valveCount - 1)
+        results += [Result("FindValve", {"valves": valveCount, "case": "hit"},
+                           TimePerCall(lambda: find(lastName), 20000), "us/call"),
+                    Result("FindValve", {"valves": valveCount, "case": "miss"},
+                           TimePerCall(lambda: findOrNone("Missing"), 2000), "us/call")]
+    return results
+
+
+def Result(name: str, parameters: dict, value: float, unit: str):
+    return {"name": name, "parameters": parameters, "value": value, "unit": unit}
+
+
+def Main():
+    outputPath = sys.argv[1] if len(sys.argv) > 1 else "RuntimeBenchmark.json"
+    rig = Rig()
+    chip = BuildChip(100)
+    results = BenchmarkRecompile(chip, rig) + BenchmarkFunctions(chip, rig) + \
+        BenchmarkParameters(chip, rig) + BenchmarkFindValve(rig)
+
+    for result in results:
+        parameters = ", ".join("%s=%s" % item for item in result["parameters"].items())
+        print("%-22s %-32s %14.3f %s" % (result["name"], parameters, result["value"],
+                                          result["unit"]))
+
+    report = {"timestamp": datetime.datetime.now().isoformat(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "results": results}
+    with open(outputPath, "w") as file:
+        json.dump(report, file, indent=2)
+    print("Results written to " + outputPath)
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,103 @@
+# Compares the number of serial writes and the wall time of a rig flush with the frames for each
+# device sent in one batched write against the previous one-write-per-frame behaviour.
+#
+# Each device writes to a pseudo-terminal so that every write is a real syscall. Run from the
+# repository root (Linux/macOS only):
+#   python -m Benchmarks.SerialWriteBenchmark
+import os
+import sys
+import threading
+import time
+
+from Data.Rig import Rig, Device
+
+
+# Stands in for a serial.Serial connection by writing to the master end of a pty. A background
+# thread drains the slave end so that writes never block.
+class PtySerial:
+    def __init__(self):
+        self.masterFD, self.slaveFD = os.openpty()
+        self.is_open = True
+        self.writeCount = 0
+        self.drainThread = threading.Thread(target=self.Drain, daemon=True)
+        self.drainThread.start()
+
+    def Drain(self):
+        while self.is_open:
+            try:
+                os.read(self.slaveFD, 4096)
+            except OSError:
+                return
+
+    def write(self, data):
+        self.writeCount += 1
+        return os.write(self.masterFD, data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+        os.close(self.masterFD)
+        os.close(self.slaveFD)
+
+
+# Writes inline on the flushing thread, so that the time of each flush includes its writes.
+class PtyDevice(Device):
+    writerType = None
+
+    def OpenPort(self):
+        return PtySerial()
+
+
+# Sends each 2-byte frame with its own write, as Device.SetSolenoids used to.
+class UnbatchedPtyDevice(PtyDevice):
+    def WritePort(self, serialPort, data):
+        data = bytes(data)
+        for i in range(0, len(data), 2):
+            serialPort.write(data[i:i + 2])
+
+
+def Measure(deviceType, boardCount: int, flushCount: int):
+    rig = Rig()
+    for i in range(boardCount):
+        device = deviceType()
+        device.enabled = True
+        device.startNumber = i * 24
+        device.Connect()
+        rig.allDevices.append(device)
+    rig.FlushStates()
+
+    for device in rig.allDevices:
+        device.serialPort.writeCount = 0
+    numbers = range(boardCount * 24)
+    elapsed = 0.0
+    for i in range(flushCount):
+        # Toggle every solenoid so that all three ports of every device must be sent.
+        state = i % 2 == 0
+        for n in numbers:
+            rig.SetSolenoidState(n, state)
+        start = time.perf_counter()
+        rig.FlushStates()
+        elapsed += time.perf_counter() - start
+
+    writes = sum(d.serialPort.writeCount for d in rig.allDevices)
+    rig.Disconnect()
+    return writes / flushCount, elapsed / flushCount
+
+
+def Main():
+    flushCount = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print("%8s %12s %16s %16s %12s" % ("Boards", "Mode", "Writes/flush", "us/flush", "Speedup"))
+    for boardCount in (1, 2, 4, 8, 16):
+        unbatchedWrites, unbatchedTime = Measure(UnbatchedPtyDevice, boardCount, flushCount)
+        batchedWrites, batchedTime = Measure(PtyDevice, boardCount, flushCount)
+        print("%8d %12s %16.1f %16.1f %12s" % (boardCount, "unbatched", unbatchedWrites,
+                                               unbatchedTime * 1e6, ""))
+        print("%8d %12s %16.1f %16.1f %11.2fx" % (boardCount, "batched", batchedWrites,
+                                                  batchedTime * 1e6,
+                                                  unbatchedTime / batchedTime))
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from Data.Rig import Device, PortWriter, PackFrames
+
+# The asyncio backend needs the optional pyserial-asyncio package.
+try:
+    import serial_asyncio
+except ImportError:
+    serial_asyncio = None
+
+
+# Runs the I/O of every device on one asyncio event loop, with a non-blocking serial transport per
+# device, instead of one writer thread per device. Rig.SetSolenoidState and Rig.FlushStates work
+# as before: flushes hand the changed port states to the devices' writers and return at once.
+class AsyncioBackend:
+    _instance = None
+
+    def __init__(self):
+        if serial_asyncio is None:
+            raise Exception("The asyncio rig backend requires the pyserial-asyncio package.")
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def Instance():
+        if AsyncioBackend._instance is None:
+            AsyncioBackend._instance = AsyncioBackend()
+        return AsyncioBackend._instance
+
+    # Makes devices that are connected from now on write through the event loop.
+    @staticmethod
+    def Install():
+        AsyncioBackend.Instance()
+        Device.writerType = AsyncioDeviceWriter
+
+    @staticmethod
+    def IsInstalled():
+        return Device.writerType is AsyncioDeviceWriter
+
+    # Runs [coroutine] on the event loop, and returns a concurrent.futures.Future for its result.
+    def Run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    # Rescans the rig for devices every [interval] seconds. Port enumeration and opening block, so
+    # they run in the loop's executor rather than on the loop itself.
+    async def RescanLoop(self, rig, interval: float):
+        while True:
+            await self.loop.run_in_executor(None, rig.RescanForDevices)
+            await asyncio.sleep(interval)
+
+
+# Tracks whether a device's transport can accept more data without buffering.
+class WriterProtocol(asyncio.Protocol):
+    def __init__(self, writer: 'AsyncioDeviceWriter'):
+        self.writer = writer
+
+    def pause_writing(self):
+        self.writer.paused = True
+
+    def resume_writing(self):
+        self.writer.paused = False
+        self.writer.WritePending()
+
+    def connection_lost(self, exc):
+        self.writer.transport = None
+
+
+# The asyncio counterpart of DeviceWriter, sharing its mailbox and statistics. While the
+# transport is applying back-pressure (e.g. a slow board), new states replace the pending ones
+# rather than queuing behind them.
+class AsyncioDeviceWriter(PortWriter):
+    def __init__(self, device: Device, serialPort):
+        super().__init__(device, serialPort)
+        self.loop = AsyncioBackend.Instance().loop
+        self.transport = None
+        self.paused = False
+        self._writeScheduled = False
+
+        self.loop.call_soon_threadsafe(self.OpenTransport)
+
+    def OpenTransport(self):
+        self.transport = serial_asyncio.SerialTransport(self.loop, WriterProtocol(self),
+                                                        self.serialPort)
+        self.WritePending()
+
+    def Wake(self):
+        if self._writeScheduled:
+            return
+        self._writeScheduled = True
+        self.loop.call_soon_threadsafe(self.WritePending)
+
+    # Runs on the event loop. The transport (and with it the serial port) is closed once stopping,
+    # after its buffer has been written.
+    def WritePending(self):
+        with self._condition:
+            self._writeScheduled = False
+            if self.transport is None or self.paused or len(self._pendingPorts) == 0:
+                portStates = None
+            else:
+                portStates, pendingSince, stamps = self.TakePending()
+            stopping = self._stopping
+        if portStates is not None:
+            try:
+                self.transport.write(bytes(PackFrames(portStates, self._frameBuffer)))
+            except (OSError, RuntimeError):
+                self.WriteFailed(portStates, pendingSince, stamps)
+                if not stopping:
+                    self.loop.call_later(self.RETRY_INTERVAL, self.WritePending)
+            else:
+                self.WriteSucceeded(pendingSince, stamps)
+        if stopping and self.transport is not None and not self.paused:
+            self.transport.close()
@@ -2,6 +2,7 @@ import typing
 from typing import Optional, List, Dict, Any, Union, Callable, Type
 from pathlib import Path
 import os
+import threading
 
 
 class Chip:
@@ -18,6 +19,65 @@ class Chip:
             self.scripts.append(Script(None, True, f.read(), x.stem))
             f.close()
 
+        # Name lookups for FindValve and FindProgram. These are rebuilt when needed after
+        # InvalidateLookup() is called. Scripts look names up from the program thread while the UI
+        # renames, so the lookups are built and invalidated under a lock: otherwise a lookup built
+        # from the old names could be stored after the invalidation.
+        self._valveLookup: Optional[Dict[str, Valve]] = None
+        self._programLookup: Optional[Dict[str, Program]] = None
+        self._lookupLock = threading.Lock()
+
+        # Increased whenever valves or programs are added, removed, renamed or renumbered, so that
+        # views of them know when to refresh.
+        self.version = 0
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        d['_valveLookup'] = None
+        d['_programLookup'] = None
+        del d['_lookupLock']
+        return d
+
+    def __setstate__(self, state):
+        # Chips saved by older versions do not have the lookups.
+        self._valveLookup = None
+        self._programLookup = None
+        self.version = 0
+        self.__dict__.update(state)
+        self._lookupLock = threading.Lock()
+
+    # Must be called whenever valves or programs are added, removed or renamed.
+    def InvalidateLookup(self):
+        with self._lookupLock:
+            self._valveLookup = None
+            self._programLookup = None
+        self.MarkChanged()
+
+    # Must be called whenever a valve's solenoid number changes. Changes that need the lookups to
+    # be rebuilt call InvalidateLookup() instead.
+    def MarkChanged(self):
+        self.version += 1
+
+    # Returns the first valve named [name], or None if there is none.
+    def FindValve(self, name: str) -> Optional['Valve']:
+        lookup = self._valveLookup
+        if lookup is None:
+            with self._lookupLock:
+                if self._valveLookup is None:
+                    self._valveLookup = BuildNameLookup(self.valves)
+                lookup = self._valveLookup
+        return lookup.get(name)
+
+    # Returns the first program named [name], or None if there is none.
+    def FindProgram(self, name: str) -> Optional['Program']:
+        lookup = self._programLookup
+        if lookup is None:
+            with self._lookupLock:
+                if self._programLookup is None:
+                    self._programLookup = BuildNameLookup(self.programs)
+                lookup = self._programLookup
+        return lookup.get(name)
+
     def ConvertPathsToRelative(self, basePath: Path):
         for image in self.images:
             image.path = Path(os.path.relpath(image.path, basePath))
@@ -34,6 +94,15 @@ class Chip:
                 continue
             script.path = (basePath / script.path).absolute()
 
+
+# Maps names to objects. Where several objects share a name, the first one is used.
+def BuildNameLookup(items: List[Any]) -> Dict[str, Any]:
+    lookup = {}
+    for item in reversed(items):
+        lookup[item.name] = item
+    return lookup
+
+
 class Valve:
     def __init__(self):
         self.name = ""
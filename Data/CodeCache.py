@@ -0,0 +1,113 @@
+import collections
+import hashlib
+import importlib.util
+import marshal
+from pathlib import Path
+from types import CodeType
+from typing import Optional
+
+import ucscript
+
+
+# Identifies the version of the ucscript module, so that compiled code from scripts is cached per
+# ucscript version and changes to ucscript are always picked up. This is read through the module's
+# loader, as in a frozen build ucscript is in a zip archive and may only be available as bytecode.
+def UcscriptVersion() -> str:
+    loader = getattr(ucscript, "__loader__", None)
+    try:
+        source = loader.get_source(ucscript.__name__)
+        if source is not None:
+            return hashlib.sha256(source.encode("utf-8")).hexdigest()
+        code = loader.get_code(ucscript.__name__)
+        if code is not None:
+            return hashlib.sha256(marshal.dumps(code)).hexdigest()
+    except Exception:
+        pass
+    # Without a version, the disk cache could hold code compiled against another ucscript.
+    return "unknown"
+
+
+UCSCRIPT_VERSION = UcscriptVersion()
+
+
+# The parts of a compiled script that are the same for every program that uses it: the code
+# object, and the symbols that the script defines once they are known. Programs share this
+# artifact, and each program only holds its own module globals, parameter values and running
+# functions.
+class CompiledScript:
+    def __init__(self, code: CodeType):
+        self.code = code
+        # Filled in by ProgramCompilation the first time the script is run.
+        self.symbols = None
+
+
+# Caches the scripts compiled from script sources, keyed by a hash of the source and the ucscript
+# version, so that programs that share a script only compile it once. Recently used scripts are
+# kept in memory, and if a cache directory is set, their code is also stored there to be reused
+# across sessions.
+class CodeCache:
+    _instance = None
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self._scripts: collections.OrderedDict = collections.OrderedDict()
+
+        # If set, compiled code is also saved to and loaded from this directory.
+        self.cacheDirectory: Optional[Path] = None
+
+        self.hitCount = 0
+        self.missCount = 0
+
+    @staticmethod
+    def Instance():
+        if CodeCache._instance is None:
+            CodeCache._instance = CodeCache()
+        return CodeCache._instance
+
+    def Compile(self, source: str) -> CompiledScript:
+        key = hashlib.sha256((UCSCRIPT_VERSION + source).encode("utf-8")).hexdigest()
+        compiledScript = self._scripts.get(key)
+        if compiledScript is not None:
+            self._scripts.move_to_end(key)
+            self.hitCount += 1
+            return compiledScript
+
+        self.missCount += 1
+        code = self.LoadFromDisk(key)
+        if code is None:
+            code = compile(source, "<string>", "exec")
+            self.SaveToDisk(key, code)
+        compiledScript = CompiledScript(code)
+        self._scripts[key] = compiledScript
+        if len(self._scripts) > self.capacity:
+            self._scripts.popitem(last=False)
+        return compiledScript
+
+    def Clear(self):
+        self._scripts.clear()
+
+    def CachePath(self, key: str) -> Optional[Path]:
+        if self.cacheDirectory is None or UCSCRIPT_VERSION == "unknown":
+            return None
+        # Code objects can only be loaded by the Python version that marshalled them.
+        return self.cacheDirectory / (key + "-" + importlib.util.MAGIC_NUMBER.hex() + ".ucc")
+
+    def LoadFromDisk(self, key: str) -> Optional[CodeType]:
+        path = self.CachePath(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return marshal.loads(path.read_bytes())
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+
+    def SaveToDisk(self, key: str, code: CodeType):
+        path = self.CachePath(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(marshal.dumps(code))
+        except OSError:
+            # The disk cache is only an optimization.
+            pass
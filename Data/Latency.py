@@ -0,0 +1,103 @@
+import bisect
+import csv
+import threading
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+# The stages of a valve actuation that are timed, as (name, start stamp, end stamp) where the
+# stamps index (state set, flush pickup, frame encoded, serial write done).
+STAGES = [("Set to flush", 0, 1),
+          ("Flush to encoded", 1, 2),
+          ("Encoded to written", 2, 3),
+          ("Set to written", 0, 3)]
+
+# Histogram bucket upper bounds in seconds, logarithmically spaced from 10 us to 10 s. Anything
+# longer goes in a final overflow bucket.
+BUCKET_BOUNDS = [10 ** (exponent / 4) for exponent in range(-20, 5)]
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0 for _ in range(len(BUCKET_BOUNDS) + 1)]
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def Add(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def Mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0.0
+
+    # The upper bound of the bucket that contains the [fraction] quantile (or the maximum, if that
+    # is lower), so the true value is at most this.
+    def Percentile(self, fraction: float) -> float:
+        if self.count == 0:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.maximum)
+        return self.maximum
+
+
+# Collects per-device histograms of how long valve state changes take to get from
+# Rig.SetSolenoidState to the serial port. Each flush of a device records one sample per stage,
+# timed from the oldest change in the flush.
+class LatencyRecorder:
+    _instance = None
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        # Device name -> stage name -> histogram.
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+    @staticmethod
+    def Instance():
+        if LatencyRecorder._instance is None:
+            LatencyRecorder._instance = LatencyRecorder()
+        return LatencyRecorder._instance
+
+    # Records a write, given the (state set, flush pickup, frame encoded, serial write done)
+    # [stamps].
+    def Record(self, deviceName: str, stamps: Tuple[float, float, float, float]):
+        if not self.enabled:
+            return
+        with self._lock:
+            if deviceName not in self.histograms:
+                self.histograms[deviceName] = {name: LatencyHistogram() for name, _, _ in STAGES}
+            deviceHistograms = self.histograms[deviceName]
+            for name, start, end in STAGES:
+                deviceHistograms[name].Add(stamps[end] - stamps[start])
+
+    def Reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    # Returns (device name, stage name, count, mean, p50, p99, max) rows, with times in seconds.
+    def Summary(self) -> List[Tuple[str, str, int, float, float, float, float]]:
+        with self._lock:
+            return [(deviceName, name, h.count, h.Mean(), h.Percentile(0.5), h.Percentile(0.99),
+                     h.maximum) for deviceName, deviceHistograms in self.histograms.items() for
+                    name, h in deviceHistograms.items()]
+
+    # Writes every histogram bucket to a CSV file, one row per device, stage and bucket.
+    def ExportCSV(self, path: Path):
+        with self._lock:
+            rows = []
+            for deviceName, deviceHistograms in self.histograms.items():
+                for name, h in deviceHistograms.items():
+                    lowerBounds = [0.0] + BUCKET_BOUNDS
+                    upperBounds = BUCKET_BOUNDS + [float('inf')]
+                    rows += [(deviceName, name, lower, upper, count) for lower, upper, count in
+                             zip(lowerBounds, upperBounds, h.counts)]
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Device", "Stage", "Lower bound (s)", "Upper bound (s)", "Count"])
+            writer.writerows(rows)
@@ -0,0 +1,115 @@
+import threading
+from typing import List, Tuple, Optional, Set
+
+from Data.Rig import Rig, CheckSolenoidNumber
+from Data.Scheduler import Now, SleepUntil
+
+# Pattern rows are switched by busy-waiting for the last part of each wait, for precise timing.
+SPIN_THRESHOLD = 0.002
+
+
+# A single row of a compiled valve pattern.
+class PatternRow:
+    def __init__(self, offset: float):
+        # Time of the row in seconds from the start of the pattern.
+        self.offset = offset
+
+        # The solenoid states that change on this row.
+        self.states: List[Tuple[int, bool]] = []
+
+        # The (device, configuration, [(port, mask, bits)]) frames that apply the changed states
+        # to each device, polarized for the device configuration at compile time.
+        self.deviceFrames = []
+
+        # Changed solenoids that were not on any enabled device at compile time.
+        self.uncoveredNumbers: Set[int] = set()
+
+
+# A valve timing table that has been compiled into device port frames, so that it can be played
+# back without running any script code.
+class CompiledPattern:
+    def __init__(self, rows: List[PatternRow], duration: Optional[float]):
+        self.rows = rows
+        self.duration = duration
+
+
+# Compiles a timing table of (time offset, bitmask) rows, where bit i of each mask is the state
+# of solenoid [solenoidNumbers][i]. [duration] is the length of one repetition of the pattern.
+def CompilePattern(rig: Rig, solenoidNumbers: List[int], table: List[Tuple[float, int]],
+                   duration: Optional[float] = None) -> CompiledPattern:
+    if len(table) == 0:
+        raise Exception("A valve pattern must have at least one row.")
+    offsets = [float(offset) for offset, _ in table]
+    if offsets[0] < 0 or any(b < a for a, b in zip(offsets, offsets[1:])):
+        raise Exception("Valve pattern rows must have increasing, non-negative time offsets.")
+    if duration is not None and duration <= offsets[-1]:
+        raise Exception("A valve pattern's duration must be longer than its last time offset.")
+    [CheckSolenoidNumber(number) for number in solenoidNumbers]
+
+    devices = [d for d in rig.allDevices if d.enabled]
+    rows = []
+    previousMask = None
+    for offset, (_, mask) in zip(offsets, table):
+        row = PatternRow(offset)
+        for bit, number in enumerate(solenoidNumbers):
+            state = bool((mask >> bit) & 1)
+            if previousMask is None or state != bool((previousMask >> bit) & 1):
+                row.states.append((number, state))
+        previousMask = mask
+
+        coveredNumbers = set()
+        for device in devices:
+            portFrames = {}
+            for number, state in row.states:
+                if not device.startNumber <= number < device.startNumber + 24:
+                    continue
+                coveredNumbers.add(number)
+                port, pin = divmod(number - device.startNumber, 8)
+                portMask, portBits = portFrames.get(port, (0, 0))
+                pinState = state != device.polarities[port]
+                portFrames[port] = (portMask | (1 << pin), portBits | (pinState << pin))
+            if len(portFrames) > 0:
+                row.deviceFrames.append((device, (device.startNumber, tuple(device.polarities)),
+                                         [(port, portMask, portBits) for
+                                          port, (portMask, portBits) in sorted(portFrames.items())]))
+        row.uncoveredNumbers = {number for number, _ in row.states} - coveredNumbers
+        rows.append(row)
+    return CompiledPattern(rows, duration)
+
+
+# Plays a compiled pattern on its own timing thread.
+class PatternPlayer:
+    def __init__(self, rig: Rig, pattern: CompiledPattern):
+        self.rig = rig
+        self.pattern = pattern
+        self.thread: Optional[threading.Thread] = None
+        self.stopEvent = threading.Event()
+
+    def Play(self, repeat=False):
+        if repeat and self.pattern.duration is None:
+            raise Exception("A valve pattern must have a duration to be repeated.")
+        self.Stop()
+        self.stopEvent = threading.Event()
+        self.thread = threading.Thread(target=self.Loop, args=(self.stopEvent, repeat),
+                                       daemon=True)
+        self.thread.start()
+
+    def Stop(self):
+        self.stopEvent.set()
+
+    def IsPlaying(self):
+        return self.thread is not None and self.thread.is_alive() and not self.stopEvent.is_set()
+
+    def Loop(self, stopEvent: threading.Event, repeat: bool):
+        startTime = Now()
+        while True:
+            for row in self.pattern.rows:
+                if not SleepUntil(startTime + row.offset, SPIN_THRESHOLD, stopEvent):
+                    return
+                self.rig.ApplyPatternRow(row.states, row.deviceFrames, row.uncoveredNumbers)
+            if not repeat:
+                return
+            startTime += self.pattern.duration
+            # Start afresh rather than rushing through rows if playback has fallen far behind.
+            if Now() > startTime + self.pattern.duration:
+                startTime = Now()
@@ -1,14 +1,28 @@
+import collections
 import enum
 import pathlib
+import threading
 import time
 import types
 import traceback
 
 import ucscript
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Tuple
 import Data.Chip as Chip
 from Data.Rig import Rig
+from Data.Scheduler import Scheduler, Now
+from Data.PatternPlayer import PatternPlayer, CompilePattern
+from Data.CodeCache import CodeCache, CompiledScript
+from Data.ScriptWatcher import ScriptWatcher
 import inspect
+import itertools
+import weakref
+
+# Functions that yield anything other than a WaitForSeconds are ticked again after this interval.
+FRAME_INTERVAL = 0.01
+
+# The number of messages that each program keeps. Older messages are dropped.
+MESSAGE_CAPACITY = 1000
 
 
 # A compiled program is built from a script and extracts parameters, functions and the description
@@ -19,12 +33,18 @@ class CompiledProgram:
         # The chip program that this instance was compiled from.
         self.program = program
 
-        # The path to the script file used for compilation and the time of last modification. This
-        # is used to automatically recompile when out-of-date.
+        # The path to the script file used for compilation and its ScriptWatcher version. This is
+        # used to automatically recompile when out-of-date.
         self.compiledPath: Optional[pathlib.Path] = None
-        self.lastModTime: Optional[float] = None
+        self.scriptVersion: Optional[int] = None
         self.lastBuiltin: Optional[Chip.Script] = None
 
+        # Increased every time the program is compiled, so that views know when to rebuild.
+        self.generation = 0
+
+        # The compiled script, which is shared with the other programs that use the same script.
+        self.compiledScript: Optional[CompiledScript] = None
+
         # The description from the compiled program.
         self.description = ""
 
@@ -36,12 +56,18 @@ class CompiledProgram:
         self.showableFunctions: List[str] = []
 
         # Message queue and any fatal error message.
-        self.messages: List[Message] = []
+        self.messages = MessageLog()
 
         # Zero-argument functions can be run by button press. Functions that yield values will
         # be run asynchronously and are stored in this dictionary.
         self.asyncFunctions: Dict[str, CompiledProgram.AsyncFunctionInfo] = {}
 
+        # The ucscript.Valve handles given to the program, for each chip valve.
+        self.valveHandles: Dict[Chip.Valve, BoundValve] = {}
+
+        # Valve patterns compiled by the program, which are stopped when it is recompiled.
+        self.patternPlayers: List[PatternPlayer] = []
+
     # Details of asynchronous functions
     class AsyncFunctionInfo:
         def __init__(self, iterator: types.GeneratorType):
@@ -57,6 +83,61 @@ class CompiledProgram:
             # The time of the last iteration.
             self.lastIterationTime = None
 
+            # Set when the function is resumed, so that the time spent paused is not treated as
+            # a timing error.
+            self.resumed = False
+
+            # Timing statistics. The timing error is how late the function was resumed after a
+            # WaitForSeconds expired.
+            self.startTime = None
+            self.iterationCount = 0
+            self.timedIterationCount = 0
+            self.lastTimingError = 0.0
+            self.maxTimingError = 0.0
+            self.totalTimingError = 0.0
+
+        def MeanTimingError(self):
+            if self.timedIterationCount == 0:
+                return 0.0
+            return self.totalTimingError / self.timedIterationCount
+
+        # The achieved number of iterations per second since the function started.
+        def IterationRate(self):
+            if self.iterationCount < 2 or self.lastIterationTime == self.startTime:
+                return 0.0
+            return (self.iterationCount - 1) / (self.lastIterationTime - self.startTime)
+
+
+# A ucscript.Valve that is bound to a chip valve and the rig.
+class BoundValve(ucscript.Valve):
+    __slots__ = ('valve', 'chip', 'rig')
+
+    def __init__(self, valve: Chip.Valve, chip: Chip.Chip, rig: Rig):
+        self.valve = valve
+        self.chip = chip
+        self.rig = rig
+
+    def SetOpen(self, state: bool):
+        self.rig.SetSolenoidState(self.valve.solenoidNumber, bool(state))
+
+    def IsOpen(self) -> bool:
+        return self.rig.GetSolenoidState(self.valve.solenoidNumber)
+
+    def Name(self) -> str:
+        return self.valve.name
+
+    def SetName(self, name: str):
+        self.valve.name = name
+        self.chip.InvalidateLookup()
+
+    def SolenoidNumber(self) -> int:
+        return self.valve.solenoidNumber
+
+    def SetSolenoidNumber(self, number: int):
+        if number != self.valve.solenoidNumber:
+            self.valve.solenoidNumber = number
+            self.chip.MarkChanged()
+
 
 class Message:
     MESSAGE = 0
@@ -68,12 +149,97 @@ class Message:
         self.messageType = messageType
 
 
+# A 'with Atomic():' block of a program, which holds back the rig flushes until it ends. As this
+# holds back every program and the UI, a block that a function leaves open across a yield is ended
+# when the tick returns (see EndOpenAtomicBlocks), rather than when the function is resumed.
+class AtomicBlock:
+    def __init__(self, rig: Rig):
+        self.rig = rig
+        self.open = False
+
+    def __enter__(self):
+        self.rig.BeginAtomic()
+        self.open = True
+        OpenAtomicBlocks().append(self)
+
+    def __exit__(self, excType, excValue, traceback):
+        if self.open:
+            OpenAtomicBlocks().remove(self)
+            self.End()
+
+    def End(self):
+        self.open = False
+        self.rig.EndAtomic()
+
+
+# The open atomic blocks, per thread, innermost last.
+_atomicBlocks = threading.local()
+
+
+def OpenAtomicBlocks() -> List[AtomicBlock]:
+    blocks = getattr(_atomicBlocks, 'blocks', None)
+    if blocks is None:
+        blocks = _atomicBlocks.blocks = []
+    return blocks
+
+
+# Ends the atomic blocks of this thread beyond the first [keepCount], and logs an error to
+# [compiledProgram] if there were any.
+def EndOpenAtomicBlocks(compiledProgram: 'CompiledProgram', keepCount: int):
+    blocks = OpenAtomicBlocks()
+    if len(blocks) <= keepCount:
+        return
+    while len(blocks) > keepCount:
+        blocks.pop().End()
+    compiledProgram.messages.Append(Message(
+        "An Atomic block was left open across a yield, which would hold back every valve change. "
+        "The block was ended early.", Message.ERROR_RT))
+
+
+# Keeps the most recent [capacity] messages of a program. Messages are added by the program worker
+# thread and read by the UI, so views take a snapshot together with the total number of messages
+# ever added, from which they can tell which messages are new.
+class MessageLog:
+    def __init__(self, capacity: Optional[int] = None):
+        if capacity is None:
+            capacity = MESSAGE_CAPACITY
+        self._lock = threading.Lock()
+        self._messages = collections.deque(maxlen=capacity)
+        self.totalCount = 0
+
+        # Increased whenever messages are removed other than by being dropped for new ones.
+        self.resetCount = 0
+
+    def Append(self, message: Message):
+        with self._lock:
+            self._messages.append(message)
+            self.totalCount += 1
+
+    # Removes every message that [predicate] does not hold for.
+    def Filter(self, predicate):
+        with self._lock:
+            self._messages = collections.deque((m for m in self._messages if predicate(m)),
+                                               maxlen=self._messages.maxlen)
+            self.resetCount += 1
+
+    # Returns (the kept messages, total count, reset count).
+    def Snapshot(self) -> Tuple[List[Message], int, int]:
+        with self._lock:
+            return list(self._messages), self.totalCount, self.resetCount
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __getitem__(self, index: int) -> Message:
+        return self._messages[index]
+
+
 # Returns 'True' if the compiled program is out-of-date.
 def IsOutOfDate(compiledProgram: CompiledProgram):
     if compiledProgram.program.script.isBuiltIn:
         return compiledProgram.program.script != compiledProgram.lastBuiltin
     return compiledProgram.lastBuiltin is not None or compiledProgram.compiledPath != compiledProgram.program.script.path or \
-        compiledProgram.lastModTime != compiledProgram.program.script.path.stat().st_mtime
+        compiledProgram.scriptVersion != ScriptWatcher.Instance().Version(compiledProgram.program.script.path)
 
 
 # Builds an environment with built-ins as well as an import interceptor to pass along the correct
@@ -104,56 +270,137 @@ def BuildEnvironment():
 def Recompile(compiledProgram: CompiledProgram, chip: Chip, rig: Rig,
               programList: List[CompiledProgram]) -> CompiledProgram:
     try:
-        compiledProgram.messages = []
+        compiledProgram.messages = MessageLog()
         program = compiledProgram.program
+        # Taken before reading, so that a change made while compiling is not missed.
+        scriptVersion = None if program.script.isBuiltIn else \
+            ScriptWatcher.Instance().Version(program.script.path)
         script = program.script.Read()
         script = "from ucscript import *\n" + script
 
+        Scheduler.Instance().UnscheduleProgram(compiledProgram)
+        StopPatterns(compiledProgram)
         CompiledProgram.__init__(compiledProgram, program)
         if program.script.isBuiltIn:
             compiledProgram.lastBuiltin = program.script
         else:
             compiledProgram.lastBuiltin = None
-            compiledProgram.lastModTime = program.script.path.stat().st_mtime
+            compiledProgram.scriptVersion = scriptVersion
             compiledProgram.compiledPath = program.script.path.absolute()
 
         globalsDict = BuildEnvironment()
-        # Compile the script. The globals dictionary will have everything that resulted from
-        # compilation.
-        exec(script, globalsDict)
+        # Compile the script (or reuse it from another program). Running it fills the globals
+        # dictionary with everything that resulted from compilation. The module is run for each
+        # program, as its parameters, functions and module-level state belong to the program.
+        compiledProgram.compiledScript = CodeCache.Instance().Compile(script)
+        exec(compiledProgram.compiledScript.code, globalsDict)
         # We can then extract symbols from the dictionary and validate them.
         ExtractSymbols(globalsDict, compiledProgram)
         MatchParameterValues(compiledProgram)
         AttachEnvironment(globalsDict, compiledProgram, chip, rig, programList)
     except Exception as e:
         LogError(compiledProgram, e, True)
+    compiledProgram.generation = next(_generations)
     return compiledProgram
 
 
+# One counter is shared by all programs, as Recompile resets each program with __init__.
+_generations = itertools.count(1)
+
+
+# The symbols that a script defines, by kind. These are found by searching the whole module the
+# first time a script is run, and are then looked up directly for other programs that use it.
+class ScriptSymbols:
+    def __init__(self):
+        self.parameters: List[str] = []
+        self.descriptions: List[str] = []
+        # (symbol, whether it is a ucscript.ProgramFunction rather than a plain function), in
+        # module order.
+        self.functions: List[Tuple[str, bool]] = []
+        self.showableFunctions: List[str] = []
+
+
 # Sort symbols from the compiled global dictionary into the CompiledProgram symbol dictionaries.
 def ExtractSymbols(globalsDict: Dict, compiledProgram: CompiledProgram):
+    compiledScript = compiledProgram.compiledScript
+    if compiledScript is None or compiledScript.symbols is None or \
+            not ExtractKnownSymbols(globalsDict, compiledProgram, compiledScript.symbols):
+        symbols = SearchSymbols(globalsDict, compiledProgram)
+        if compiledScript is not None:
+            compiledScript.symbols = symbols
+
+    for parameterSymbol in compiledProgram.parameters:
+        if compiledProgram.parameters[parameterSymbol].displayName is None:
+            # TODO: beautify symbol
+            compiledProgram.parameters[parameterSymbol].displayName = parameterSymbol
+    for functionSymbol in compiledProgram.programFunctions:
+        if compiledProgram.programFunctions[functionSymbol].functionName is None:
+            # TODO: beautify symbol
+            compiledProgram.programFunctions[functionSymbol].functionName = functionSymbol
+
+
+# Finds the symbols of a script by searching its whole module. Only functions defined by the script
+# itself are taken, and not those that it imports (e.g. from ucscript or NumPy).
+def SearchSymbols(globalsDict: Dict, compiledProgram: CompiledProgram) -> ScriptSymbols:
+    symbols = ScriptSymbols()
     for symbol in globalsDict:
         value = globalsDict[symbol]
         if isinstance(value, ucscript.Parameter):
             compiledProgram.parameters[symbol] = value
+            symbols.parameters.append(symbol)
         elif isinstance(value, ucscript.SetDescription):
             compiledProgram.description = value.description
+            symbols.descriptions.append(symbol)
         elif isinstance(value, ucscript.ProgramFunction):
             compiledProgram.programFunctions[symbol] = value
-        elif inspect.isfunction(value):
+            symbols.functions.append((symbol, True))
+        elif inspect.isfunction(value) and value.__globals__ is globalsDict:
             compiledProgram.programFunctions[symbol] = ucscript.ProgramFunction(value)
+            symbols.functions.append((symbol, False))
     compiledProgram.showableFunctions = [x for x, f in compiledProgram.programFunctions.items() if
-                                         len(inspect.signature(
-                                             f.function).parameters) == 0 and not f.hidden]
-
-    for parameterSymbol in compiledProgram.parameters:
-        if compiledProgram.parameters[parameterSymbol].displayName is None:
-            # TODO: beautify symbol
-            compiledProgram.parameters[parameterSymbol].displayName = parameterSymbol
-    for functionSymbol in compiledProgram.programFunctions:
-        if compiledProgram.programFunctions[functionSymbol].functionName is None:
-            # TODO: beautify symbol
-            compiledProgram.programFunctions[functionSymbol].functionName = functionSymbol
+                                         not f.hidden and ParameterCount(f.function) == 0]
+    symbols.showableFunctions = compiledProgram.showableFunctions.copy()
+    return symbols
+
+
+# The number of parameters in the signature of each function, by code object. This is cached as
+# inspecting signatures is slow.
+_parameterCounts = weakref.WeakKeyDictionary()
+
+
+def ParameterCount(function) -> int:
+    # The signature of a wrapper depends on what it wraps, not only on its code.
+    if not inspect.isfunction(function) or hasattr(function, '__wrapped__') or \
+            hasattr(function, '__signature__'):
+        return len(inspect.signature(function).parameters)
+    count = _parameterCounts.get(function.__code__)
+    if count is None:
+        count = _parameterCounts[function.__code__] = len(inspect.signature(function).parameters)
+    return count
+
+
+# Extracts the symbols that a script was found to define when it was first run. Returns False
+# (having extracted nothing) if the module does not match them, e.g. because the script defines
+# different symbols each time it is run.
+def ExtractKnownSymbols(globalsDict: Dict, compiledProgram: CompiledProgram,
+                        symbols: ScriptSymbols) -> bool:
+    if not all(isinstance(globalsDict.get(s), ucscript.Parameter) for s in symbols.parameters) or \
+            not all(isinstance(globalsDict.get(s), ucscript.SetDescription) for s in
+                    symbols.descriptions) or \
+            not all(isinstance(globalsDict.get(s), ucscript.ProgramFunction) if isProgramFunction
+                    else inspect.isfunction(globalsDict.get(s)) for s, isProgramFunction in
+                    symbols.functions):
+        return False
+    for symbol in symbols.parameters:
+        compiledProgram.parameters[symbol] = globalsDict[symbol]
+    for symbol in symbols.descriptions:
+        compiledProgram.description = globalsDict[symbol].description
+    for symbol, isProgramFunction in symbols.functions:
+        value = globalsDict[symbol]
+        compiledProgram.programFunctions[symbol] = value if isProgramFunction else \
+            ucscript.ProgramFunction(value)
+    compiledProgram.showableFunctions = symbols.showableFunctions.copy()
+    return True
 
 
 # Make sure that the program parameter values dictionary has the appropriate fields.
@@ -177,26 +424,17 @@ def MatchParameterValues(compiledProgram: CompiledProgram):
 #   - Get() and Set() methods of all Parameter objects
 #   - Asynchronous calling and Stop/Pause methods for all ProgramFunction objects
 #   - FindValve() and FindProgram()
+#   - Valve patterns and bulk valve state changes
 def AttachEnvironment(globalsDict: Dict, compiledProgram: CompiledProgram, chip: Chip, rig: Rig,
                       compiledProgramList: List[CompiledProgram]):
     # When FindValve() or Parameter.Get() is used to get a ucscript.Valve object, it must be bound
-    # to the rig and the underlying Valve object.
+    # to the rig and the underlying Valve object. One handle is kept for each valve.
     def BuildUCSValve(valve: Chip.Valve):
-        v = ucscript.Valve()
-        v.IsOpen = lambda: rig.GetSolenoidState(valve.solenoidNumber)
-        v.SetOpen = lambda x: rig.SetSolenoidState(valve.solenoidNumber, bool(x))
-
-        def SetSolenoidNumber(x):
-            valve.solenoidNumber = x
-
-        def SetName(x):
-            valve.name = x
-
-        v.SetSolenoidNumber = SetSolenoidNumber
-        v.SetName = SetName
-        v.Name = lambda: valve.name
-        v.SolenoidNumber = lambda: valve.solenoidNumber
-        return v
+        handle = compiledProgram.valveHandles.get(valve)
+        if handle is None:
+            handle = BoundValve(valve, chip, rig)
+            compiledProgram.valveHandles[valve] = handle
+        return handle
 
     # When FindProgram() or Parameter.Get() is used to get a ucscript.Program object, it must be
     # bound to the functions and parameters that are bound to the uChip environment.
@@ -211,6 +449,7 @@ def AttachEnvironment(globalsDict: Dict, compiledProgram: CompiledProgram, chip:
 
         def SetName(x):
             program.name = x
+            chip.InvalidateLookup()
 
         p.SetName = SetName
         return p
@@ -270,20 +509,40 @@ def AttachEnvironment(globalsDict: Dict, compiledProgram: CompiledProgram, chip:
 
     # Bind the FindValve and FindProgram global methods to the uChip environment.
     def FindValveInChip(name: str):
-        valve = ExceptionIfNone(next((x for x in chip.valves if x.name == name), None),
-                                "Could not find a valve named '%s'." % name)
+        valve = ExceptionIfNone(chip.FindValve(name), "Could not find a valve named '%s'." % name)
         return BuildUCSValve(valve)
 
     def FindProgramInChip(name: str):
-        program = ExceptionIfNone(next((x for x in chip.programs if x.name == name), None),
+        program = ExceptionIfNone(chip.FindProgram(name),
                                   "Could not find a program named '%s'." % name)
         return BuildUCSProgram(program)
 
+    # Compiles a valve timing table into device frames that are played back on a timing thread.
+    def CompileValvePatternInRig(valves: List[ucscript.Valve], rows, duration: Optional[float] = None):
+        player = PatternPlayer(rig, CompilePattern(rig, [v.SolenoidNumber() for v in valves], rows,
+                                                   duration))
+        compiledProgram.patternPlayers.append(player)
+        pattern = ucscript.ValvePattern()
+        pattern.Play = player.Play
+        pattern.Stop = player.Stop
+        pattern.IsPlaying = player.IsPlaying
+        return pattern
+
+    def SetValvesInRig(states: Dict[ucscript.Valve, bool]):
+        rig.SetSolenoidStates({valve.SolenoidNumber(): bool(state) for valve, state in states.items()})
+
+    def SetSolenoidMaskInRig(start: int, mask: int, count: int = 8):
+        rig.SetSolenoidStates({start + i: bool((mask >> i) & 1) for i in range(count)})
+
     def DoPrint(text: str):
-        compiledProgram.messages.append(Message(text, Message.MESSAGE))
+        compiledProgram.messages.Append(Message(text, Message.MESSAGE))
 
     globalsDict['FindValve'] = FindValveInChip
     globalsDict['FindProgram'] = FindProgramInChip
+    globalsDict['CompileValvePattern'] = CompileValvePatternInRig
+    globalsDict['SetValves'] = SetValvesInRig
+    globalsDict['SetSolenoidMask'] = SetSolenoidMaskInRig
+    globalsDict['Atomic'] = lambda: AtomicBlock(rig)
     globalsDict['Log'] = DoPrint
 
 
@@ -307,11 +566,16 @@ def CallFunction(compiledProgram: CompiledProgram, functionSymbol: str, *fargs,
             compiledProgram.programFunctions[functionSymbol].canAsync:
         newRunning = CompiledProgram.AsyncFunctionInfo(returnValue)
         compiledProgram.asyncFunctions[functionSymbol] = newRunning
+        Scheduler.Instance().Schedule(compiledProgram, functionSymbol, Now())
     else:
         return returnValue
 
 
-def TickFunction(compiledProgram: CompiledProgram, currentTime: float, functionSymbol: str):
+# Advances a running function if it is due. If [keepDeadline] is set, the next wait is measured
+# from the deadline of the expired WaitForSeconds rather than from [currentTime], so that timing
+# errors do not accumulate over a sequence of waits.
+def TickFunction(compiledProgram: CompiledProgram, currentTime: float, functionSymbol: str,
+                 keepDeadline=False):
     if functionSymbol not in compiledProgram.asyncFunctions:
         return
 
@@ -323,27 +587,62 @@ def TickFunction(compiledProgram: CompiledProgram, currentTime: float, functionS
     FinishedIndicator = FinishedIndicator()
     if functionInfo.paused:
         return
+    iterationTime = currentTime
     if isinstance(functionInfo.yieldedValue, ucscript.WaitForSeconds):
-        if currentTime - functionInfo.lastIterationTime < functionInfo.yieldedValue.seconds:
+        deadline = functionInfo.lastIterationTime + functionInfo.yieldedValue.seconds
+        if currentTime < deadline:
             return
+        if not functionInfo.resumed:
+            error = currentTime - deadline
+            functionInfo.timedIterationCount += 1
+            functionInfo.lastTimingError = error
+            functionInfo.maxTimingError = max(functionInfo.maxTimingError, error)
+            functionInfo.totalTimingError += error
+            # If more than a whole wait behind, catching up would run iterations back-to-back.
+            if keepDeadline and error < functionInfo.yieldedValue.seconds:
+                iterationTime = deadline
+    functionInfo.resumed = False
+    if functionInfo.startTime is None:
+        functionInfo.startTime = iterationTime
+    openBlockCount = len(OpenAtomicBlocks())
     try:
         functionInfo.yieldedValue = next(functionInfo.iterator, FinishedIndicator)
-        functionInfo.lastIterationTime = currentTime
+        functionInfo.lastIterationTime = iterationTime
+        functionInfo.iterationCount += 1
     except Exception as e:
         LogError(compiledProgram, e, False)
         StopFunction(compiledProgram, functionSymbol)
         return
+    finally:
+        # The function may have yielded (and so may be paused or stopped) inside an atomic block.
+        EndOpenAtomicBlocks(compiledProgram, openBlockCount)
     compiledProgram.lastCallTime = currentTime
     if functionInfo.yieldedValue is FinishedIndicator:
         del compiledProgram.asyncFunctions[functionSymbol]
 
 
+# Returns the time at which a running function should next be ticked, or None if it is not
+# running or is paused.
+def NextTickTime(compiledProgram: CompiledProgram, functionSymbol: str) -> Optional[float]:
+    if functionSymbol not in compiledProgram.asyncFunctions:
+        return None
+    functionInfo = compiledProgram.asyncFunctions[functionSymbol]
+    if functionInfo.paused:
+        return None
+    if functionInfo.lastIterationTime is None:
+        return Now()
+    if isinstance(functionInfo.yieldedValue, ucscript.WaitForSeconds):
+        return functionInfo.lastIterationTime + functionInfo.yieldedValue.seconds
+    return functionInfo.lastIterationTime + FRAME_INTERVAL
+
+
 def StopFunction(compiledProgram: CompiledProgram, functionSymbol: str):
     if functionSymbol not in compiledProgram.asyncFunctions:
         raise Exception("Could not find running function '%s' in program '%s'" %
                         (functionSymbol, compiledProgram.program.name))
     compiledProgram.programFunctions[functionSymbol].onStop()
     del compiledProgram.asyncFunctions[functionSymbol]
+    Scheduler.Instance().Unschedule(compiledProgram, functionSymbol)
 
 
 def SetFunctionPaused(compiledProgram: CompiledProgram, functionSymbol: str, paused: bool):
@@ -353,6 +652,11 @@ def SetFunctionPaused(compiledProgram: CompiledProgram, functionSymbol: str, pau
     compiledProgram.programFunctions[functionSymbol].onPause() if paused else \
         compiledProgram.programFunctions[functionSymbol].onResume()
     compiledProgram.asyncFunctions[functionSymbol].paused = paused
+    if paused:
+        Scheduler.Instance().Unschedule(compiledProgram, functionSymbol)
+    else:
+        compiledProgram.asyncFunctions[functionSymbol].resumed = True
+        Scheduler.Instance().Schedule(compiledProgram, functionSymbol, Now())
 
 
 def IsFunctionRunning(compiledProgram: CompiledProgram, functionSymbol: str):
@@ -364,6 +668,12 @@ def IsFunctionPaused(compiledProgram: CompiledProgram, functionSymbol: str):
         compiledProgram.asyncFunctions[functionSymbol].paused
 
 
+def StopPatterns(compiledProgram: CompiledProgram):
+    for player in compiledProgram.patternPlayers:
+        player.Stop()
+    compiledProgram.patternPlayers = []
+
+
 def NoneValueForType(t):
     if t == int:
         return 0
@@ -425,4 +735,4 @@ def ExceptionIfNone(value, message):
 
 def LogError(compiledProgram: CompiledProgram, error: Exception, compileTime: bool):
     errorText = "".join(traceback.format_exception(type(error), error, error.__traceback__))
-    compiledProgram.messages.append(Message(errorText, Message.ERROR_CT if compileTime else Message.ERROR_RT))
+    compiledProgram.messages.Append(Message(errorText, Message.ERROR_CT if compileTime else Message.ERROR_RT))
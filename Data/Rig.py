@@ -1,56 +1,226 @@
-from typing import Dict
+import contextlib
+import threading
+from typing import Dict, Set, Callable, Tuple
 from serial.tools.list_ports import comports
 from typing import List, Optional
-from serial import Serial
+from serial import Serial, SerialException
 from serial.tools.list_ports_common import ListPortInfo
+from Data.Scheduler import Now
+from Data.Latency import LatencyRecorder
+
+
+# The number of solenoids that the rig can address. This covers every number that a valve or a
+# device's 24 solenoids can be assigned in the UI.
+MAX_SOLENOIDS = 1024
 
 
 class Rig:
     def __init__(self):
-        self.solenoidStates: Dict[int, bool] = {}
+        # The state of every solenoid, indexed by solenoid number (0 or 1 per byte). Devices read
+        # their 24 solenoids directly from a slice of this store.
+        self.solenoidStates = bytearray(MAX_SOLENOIDS)
+        self._stateView = memoryview(self.solenoidStates)
         self.allDevices: List[Device] = []
 
-    def RescanForDevices(self):
-        portInfos = RescanPorts()
+        # Solenoids whose state has changed since the last flush. Only the ports that contain
+        # these solenoids are sent to the devices.
+        self.dirtySolenoids: Set[int] = set()
+        self._lock = threading.RLock()
 
-        for device in self.allDevices:
-            match = next((p for p in portInfos if p.hwid == device.portInfo.hwid),
-                         None)
-            if match is not None:
-                device.portInfo = match
-                device.available = True
-                if device.enabled:
-                    device.Connect()
-            else:
-                device.available = False
-                device.Disconnect()
+        # When the oldest change that is waiting to be flushed was made, for latency statistics.
+        self._dirtySince: Optional[float] = None
+
+        # Called whenever a solenoid state changes while no other changes are waiting to be
+        # flushed, so that a flush can be scheduled.
+        self.dirtyListeners: List[Callable[[], None]] = []
 
-        for portInfo in portInfos:
-            if portInfo.hwid not in [d.portInfo.hwid for d in
-                                     self.allDevices] or portInfo.hwid == "":
-                newDevice = Device()
-                newDevice.portInfo = portInfo
-                newDevice.available = True
-                self.allDevices.append(newDevice)
+        # While greater than zero, flushes are held back so that a group of changes reaches the
+        # devices together.
+        self._atomicDepth = 0
+
+        # Called (from whichever thread made the change) when devices appear or disappear, or when
+        # a device is connected or disconnected.
+        self.devicesChangedListeners: List[Callable[[], None]] = []
+
+        # Called with the numbers of the solenoids that changed, once per flush (or pattern row),
+        # from the thread that flushed.
+        self.solenoidsChangedListeners: List[Callable[[Set[int]], None]] = []
+
+    # Diffs the current serial ports against the known devices by port key. Devices whose port
+    # has appeared are connected if enabled, devices whose port has gone are disconnected, and
+    # unknown ports are added as new (disabled) devices.
+    def RescanForDevices(self):
+        portInfos = {PortKey(portInfo): portInfo for portInfo in RescanPorts()}
+
+        changed = False
+        toConnect = []
+        toDisconnect = []
+        with self._lock:
+            knownKeys = set()
+            for device in self.allDevices:
+                key = PortKey(device.portInfo)
+                knownKeys.add(key)
+                portInfo = portInfos.get(key)
+                if portInfo is not None:
+                    device.portInfo = portInfo
+                    if device.enabled and not device.IsConnected():
+                        toConnect.append(device)
+                elif device.IsConnected():
+                    toDisconnect.append(device)
+                if device.available != (portInfo is not None):
+                    device.available = portInfo is not None
+                    changed = True
+
+            for key, portInfo in portInfos.items():
+                if key not in knownKeys:
+                    newDevice = Device()
+                    newDevice.portInfo = portInfo
+                    newDevice.available = True
+                    self.allDevices.append(newDevice)
+                    changed = True
+
+        for device in toDisconnect:
+            self.DisconnectDevice(device)
+        for device in toConnect:
+            try:
+                self.ConnectDevice(device)
+            except SerialException:
+                # The port may still be settling or be held by another program. It is retried on
+                # the next rescan.
+                pass
+        if changed:
+            self.NotifyDevicesChanged()
+
+    # Opens the device's serial port without holding the rig lock, as this can be slow, so that
+    # flushes to the other devices carry on meanwhile. The port is then swapped in under the lock.
+    def ConnectDevice(self, device: 'Device'):
+        if device.IsConnected():
+            return
+        serialPort = device.OpenPort()
+        with self._lock:
+            if device.IsConnected():
+                # Connected by another thread while the port was being opened.
+                device.ClosePort(serialPort)
+                return
+            device.AttachPort(serialPort)
+        self.NotifyDevicesChanged()
+        # Wake the flushing thread so that the new connection is sent the current states.
+        [listener() for listener in self.dirtyListeners]
+
+    def DisconnectDevice(self, device: 'Device'):
+        with self._lock:
+            wasConnected = device.IsConnected()
+            serialPort = device.DetachPort()
+        if serialPort is not None:
+            device.ClosePort(serialPort)
+        if wasConnected:
+            self.NotifyDevicesChanged()
+
+    def NotifyDevicesChanged(self):
+        [listener() for listener in self.devicesChangedListeners]
 
     def Disconnect(self):
         for device in self.allDevices:
-            device.Disconnect()
+            self.DisconnectDevice(device)
 
     def SetSolenoidState(self, number: int, state: bool):
-        self.solenoidStates[number] = state
-
-    def GetSolenoidState(self, number: int):
-        if number not in self.solenoidStates:
-            self.solenoidStates[number] = False
-        return self.solenoidStates[number]
+        CheckSolenoidNumber(number)
+        # The store holds exactly 0 or 1 per solenoid, which the port packing relies on.
+        state = 1 if state else 0
+        with self._lock:
+            if self.solenoidStates[number] != state:
+                self.solenoidStates[number] = state
+                wasClean = len(self.dirtySolenoids) == 0
+                self.dirtySolenoids.add(number)
+                if wasClean:
+                    self._dirtySince = Now()
+                    [listener() for listener in self.dirtyListeners]
+
+    # Sets several solenoid states at once. The changes are sent together in the next flush.
+    def SetSolenoidStates(self, states: Dict[int, bool]):
+        [CheckSolenoidNumber(number) for number in states]
+        with self._lock:
+            wasClean = len(self.dirtySolenoids) == 0
+            for number, state in states.items():
+                state = 1 if state else 0
+                if self.solenoidStates[number] != state:
+                    self.solenoidStates[number] = state
+                    self.dirtySolenoids.add(number)
+            if wasClean and len(self.dirtySolenoids) > 0:
+                self._dirtySince = Now()
+                [listener() for listener in self.dirtyListeners]
+
+    def BeginAtomic(self):
+        with self._lock:
+            self._atomicDepth += 1
+
+    def EndAtomic(self):
+        with self._lock:
+            self._atomicDepth -= 1
+            if self._atomicDepth == 0 and len(self.dirtySolenoids) > 0:
+                [listener() for listener in self.dirtyListeners]
+
+    # Changes made inside a 'with rig.Atomic():' block are not flushed until the block ends.
+    @contextlib.contextmanager
+    def Atomic(self):
+        self.BeginAtomic()
+        try:
+            yield
+        finally:
+            self.EndAtomic()
+
+    def GetSolenoidState(self, number: int) -> bool:
+        # Solenoids outside of the store can never have been set.
+        if not 0 <= number < MAX_SOLENOIDS:
+            return False
+        return self.solenoidStates[number] == 1
 
     def FlushStates(self):
-        for device in self.allDevices:
-            device.SetSolenoids(self.solenoidStates)
+        with self._lock:
+            if self._atomicDepth > 0:
+                return
+            changedNumbers = self.dirtySolenoids
+            flushTime = Now()
+            stamps = (flushTime if self._dirtySince is None else self._dirtySince, flushTime)
+            self.dirtySolenoids = set()
+            self._dirtySince = None
+            for device in self.allDevices:
+                device.SetSolenoids(self._stateView, changedNumbers, stamps)
+        if len(changedNumbers) > 0:
+            [listener(changedNumbers) for listener in self.solenoidsChangedListeners]
         # for device in self.allDevices:
         #     device.Flush()
 
+    # Applies a row of a precompiled valve pattern: the new solenoid states and, for each device,
+    # the (device, configuration, port frames) to write immediately. If a device could not be
+    # written this way, or some of the solenoids are not on any device, the changed solenoids are
+    # left to the next flush instead.
+    def ApplyPatternRow(self, states: List[Tuple[int, bool]],
+                        deviceFrames: List[Tuple['Device', tuple, List[Tuple[int, int, int]]]],
+                        uncoveredNumbers: Set[int]):
+        with self._lock:
+            changedNumbers = set()
+            for number, state in states:
+                state = 1 if state else 0
+                if self.solenoidStates[number] != state:
+                    self.solenoidStates[number] = state
+                    changedNumbers.add(number)
+            unsent = uncoveredNumbers
+            now = Now()
+            for device, configuration, portFrames in deviceFrames:
+                if not device.SendPortFrames(configuration, portFrames, (now, now)):
+                    unsent = {number for number, _ in states}
+            if len(unsent) > 0:
+                wasClean = len(self.dirtySolenoids) == 0
+                self.dirtySolenoids.update(unsent)
+                if wasClean:
+                    self._dirtySince = now
+                    [listener() for listener in self.dirtyListeners]
+            # Changes left to the next flush are reported with it.
+            changedNumbers -= unsent
+        if len(changedNumbers) > 0:
+            [listener(changedNumbers) for listener in self.solenoidsChangedListeners]
+
     def GetConnectedSolenoidNumbers(self):
         numbers = []
         for d in self.allDevices:
@@ -61,7 +231,136 @@ class Rig:
         return sorted(numbers)
 
 
+# The mailbox and statistics shared by the device writers, which write a device's port frames
+# without holding up flushing to the other devices or the program timing. The mailbox keeps only
+# the latest state of each port: a state published before the previous one for its port was
+# written replaces it, so at most one frame per port is ever waiting. States whose write fails
+# are put back and retried after RETRY_INTERVAL, as the device has already recorded them as sent.
+class PortWriter:
+    RETRY_INTERVAL = 0.01
+
+    def __init__(self, device: 'Device', serialPort):
+        self.device = device
+        self.serialPort = serialPort
+        self._condition = threading.Condition()
+        self._pendingPorts: Dict[int, int] = {}
+        self._pendingSince: Optional[float] = None
+        self._pendingStamps = None
+        self._stopping = False
+        self._frameBuffer = bytearray(b'A\x00B\x00C\x00')
+
+        # Statistics. The write latency is the time from the oldest pending state being published
+        # to the write that contains it completing.
+        self.publishCount = 0
+        self.supersededCount = 0
+        self.writeCount = 0
+        self.writeErrorCount = 0
+        self.lastWriteLatency = 0.0
+        self.maxWriteLatency = 0.0
+        self.totalWriteLatency = 0.0
+
+    # Hands over (port, byte) states to be written. [stamps] are the latency stamps of the states,
+    # if they are being timed. While states are pending, the stamps of the oldest are kept.
+    def Publish(self, portStates: List[Tuple[int, int]], stamps=None):
+        with self._condition:
+            for port, portState in portStates:
+                if port in self._pendingPorts:
+                    self.supersededCount += 1
+                self._pendingPorts[port] = portState
+            if self._pendingSince is None:
+                self._pendingSince = Now()
+                self._pendingStamps = stamps
+            self.publishCount += 1
+            self.Wake()
+
+    # The number of port frames waiting to be written.
+    def QueueDepth(self) -> int:
+        with self._condition:
+            return len(self._pendingPorts)
+
+    def MeanWriteLatency(self) -> float:
+        return self.totalWriteLatency / self.writeCount if self.writeCount > 0 else 0.0
+
+    # Writes any pending states, then closes the serial port.
+    def Stop(self):
+        with self._condition:
+            self._stopping = True
+            self.Wake()
+
+    # Called with the lock held when there is something new to do.
+    def Wake(self):
+        pass
+
+    # Takes the pending states for writing, returning (port states, pending since, stamps).
+    # Must be called with the lock held.
+    def TakePending(self):
+        pending = (sorted(self._pendingPorts.items()), self._pendingSince, self._pendingStamps)
+        self._pendingPorts = {}
+        self._pendingSince = None
+        self._pendingStamps = None
+        return pending
+
+    def WriteSucceeded(self, pendingSince: float, stamps):
+        latency = Now() - pendingSince
+        self.writeCount += 1
+        self.lastWriteLatency = latency
+        self.maxWriteLatency = max(self.maxWriteLatency, latency)
+        self.totalWriteLatency += latency
+        if stamps is not None:
+            LatencyRecorder.Instance().Record(self.device.Name(), stamps + (Now(),))
+
+    # Puts back the states of a failed write, unless a newer state for their port is pending.
+    # Nothing more can be written once the port is being closed.
+    def WriteFailed(self, portStates: List[Tuple[int, int]], pendingSince: float, stamps):
+        with self._condition:
+            self.writeErrorCount += 1
+            if self._stopping:
+                return
+            for port, portState in portStates:
+                self._pendingPorts.setdefault(port, portState)
+            if self._pendingSince is None or pendingSince < self._pendingSince:
+                self._pendingSince = pendingSince
+                self._pendingStamps = stamps
+
+
+# Writes a device's port frames on its own thread, so that a slow or wedged serial port only holds
+# up its own writer.
+class DeviceWriter(PortWriter):
+    def __init__(self, device: 'Device', serialPort):
+        super().__init__(device, serialPort)
+        self.thread = threading.Thread(target=self.Loop, daemon=True)
+        self.thread.start()
+
+    def Wake(self):
+        self._condition.notify()
+
+    def Loop(self):
+        failed = False
+        while True:
+            with self._condition:
+                if failed and not self._stopping:
+                    self._condition.wait(self.RETRY_INTERVAL)
+                while len(self._pendingPorts) == 0 and not self._stopping:
+                    self._condition.wait()
+                if len(self._pendingPorts) == 0:
+                    break
+                portStates, pendingSince, stamps = self.TakePending()
+            try:
+                self.device.WritePort(self.serialPort, PackFrames(portStates, self._frameBuffer))
+            except (SerialException, OSError):
+                self.WriteFailed(portStates, pendingSince, stamps)
+                failed = True
+            else:
+                self.WriteSucceeded(pendingSince, stamps)
+                failed = False
+        self.device.ClosePort(self.serialPort)
+
+
 class Device:
+    # The type of writer that is created for the serial port of each connected device, or None to
+    # write frames from the flushing thread. Replaced at startup to change the I/O backend.
+    writerType = DeviceWriter
+
     def __init__(self):
         self.portInfo: Optional[ListPortInfo] = None
         self.startNumber = 0
@@ -69,7 +368,19 @@ class Device:
         self.enabled = False
         self.available = False
         self.serialPort: Optional[Serial] = None
-        self.solenoidStates = [False for _ in range(24)]
+
+        # The port bytes that were last sent (or handed to the writer) for each of the A, B and C
+        # ports, and the configuration they were sent with. None means that the port must be
+        # rewritten.
+        self._sentPorts: List[Optional[int]] = [None, None, None]
+        self._sentConfiguration = None
+
+        # Frames for all changed ports are packed into this buffer so that they can be sent with
+        # a single write.
+        self._frameBuffer = bytearray(b'A\x00B\x00C\x00')
+
+        # Writes to the serial port while the device is connected, if writerType is set.
+        self.writer = None
 
     def IsConnected(self):
         return self.serialPort is not None and self.serialPort.is_open
@@ -77,50 +388,126 @@ class Device:
     def __getstate__(self):
         d = self.__dict__.copy()
         d['serialPort'] = None
+        d['writer'] = None
         d['available'] = False
+        d['_sentPorts'] = [None, None, None]
+        d['_sentConfiguration'] = None
         return d
 
     def __setstate__(self, state):
-        self.__dict__ = state
-
-    def SetSolenoids(self, solenoidStates: Dict[int, bool]):
+        # Devices saved by older versions do not have all of the current fields.
+        Device.__init__(self)
+        state.pop('solenoidStates', None)
+        self.__dict__.update(state)
+
+    # Sends the solenoid states to the device, given as a store of one byte per solenoid number
+    # like Rig.solenoidStates. If [changedNumbers] is given, only the 8-solenoid ports that contain
+    # a changed solenoid are considered. Ports are only written if their value differs from what
+    # was last sent to the device.
+    # [stamps] are the (state set, flush pickup) times of the states, if they are being timed.
+    def SetSolenoids(self, solenoidStates, changedNumbers: Optional[Set[int]] = None,
+                     stamps: Optional[Tuple[float, float]] = None):
         if not self.enabled or not self.IsConnected():
             return
 
-        for i in range(self.startNumber, self.startNumber + 24):
-            if i in solenoidStates:
-                self.solenoidStates[i - self.startNumber] = solenoidStates[i]
+        configuration = (self.startNumber, tuple(self.polarities))
+        if changedNumbers is None or configuration != self._sentConfiguration:
+            ports = {0, 1, 2}
+        else:
+            ports = {(n - self.startNumber) // 8 for n in changedNumbers if
+                     self.startNumber <= n < self.startNumber + 24}
+            ports.update(i for i, sent in enumerate(self._sentPorts) if sent is None)
+        self._sentConfiguration = configuration
+
+        packedPorts = PackPorts(memoryview(solenoidStates)[self.startNumber:self.startNumber + 24])
+        self.SendPortStates([(port, packedPorts[port] ^ (0xFF if self.polarities[port] else 0))
+                             for port in sorted(ports)],
+                            None if stamps is None else stamps + (Now(),))
+
+    # Writes precompiled port frames, given as (port, mask, bits) where [bits] are the polarized
+    # values of the [mask] pins. The other pins keep the values that were last sent. Returns False
+    # if nothing could be written, because the device is not connected or has not been sent its
+    # full state with [configuration] yet.
+    def SendPortFrames(self, configuration, portFrames: List[Tuple[int, int, int]],
+                       stamps: Optional[Tuple[float, float]] = None) -> bool:
+        if not self.enabled or not self.IsConnected() or configuration != self._sentConfiguration:
+            return False
+        if any(self._sentPorts[port] is None for port, _, _ in portFrames):
+            return False
+        self.SendPortStates([(port, (self._sentPorts[port] & ~mask) | bits) for port, mask, bits in
+                             portFrames], None if stamps is None else stamps + (Now(),))
+        return True
+
+    # Sends (port, byte) states in a single write, skipping ports whose byte is unchanged. If the
+    # device has a writer, the states are handed to it and this does not wait for the write.
+    # [stamps] are the (state set, flush pickup, frame encoded) times of the states, if they are
+    # being timed.
+    def SendPortStates(self, portStates: List[Tuple[int, int]],
+                       stamps: Optional[Tuple[float, float, float]] = None):
+        changedStates = [(port, portState) for port, portState in portStates if
+                         portState != self._sentPorts[port]]
+        if len(changedStates) == 0:
+            return
+        for port, portState in changedStates:
+            self._sentPorts[port] = portState
+        if self.writer is not None:
+            self.writer.Publish(changedStates, stamps)
+        else:
+            self.WritePort(self.serialPort, PackFrames(changedStates, self._frameBuffer))
+            if stamps is not None:
+                LatencyRecorder.Instance().Record(self.Name(), stamps + (Now(),))
 
-        polarizedStates = [state != self.polarities[int(i / 8)] for (i, state) in
-                           enumerate(self.solenoidStates)]
-        aState = ConvertPinStatesToBytes(polarizedStates[0:8])
-        bState = ConvertPinStatesToBytes(polarizedStates[8:16])
-        cState = ConvertPinStatesToBytes(polarizedStates[16:24])
-        self.Write(b'A' + aState)
-        self.Write(b'B' + bState)
-        self.Write(b'C' + cState)
+    def Name(self):
+        return self.portInfo.name if self.portInfo is not None else "Device"
 
-    def Write(self, data):
-        self.serialPort.write(data)
+    def WritePort(self, serialPort, data):
+        serialPort.write(data)
 
     def Flush(self):
         if not self.enabled or not self.IsConnected():
             return
         self.serialPort.flush()
 
+    # Opens the device's serial port and initializes its three ports. The device does not use
+    # the port until it is attached.
+    def OpenPort(self):
+        serialPort = Serial(self.portInfo.device, baudrate=115200, timeout=0, write_timeout=0)
+        serialPort.write(b'!A' + bytes([0]) + b'!B' + bytes([0]) + b'!C' + bytes([0]))
+        serialPort.flush()
+        return serialPort
+
+    def ClosePort(self, serialPort):
+        if serialPort.is_open:
+            serialPort.close()
+
+    def AttachPort(self, serialPort):
+        self._sentPorts = [None, None, None]
+        if self.writerType is not None:
+            self.writer = self.writerType(self, serialPort)
+        self.serialPort = serialPort
+
+    # Stops the device from using its serial port. Returns the port if it must be closed by the
+    # caller; a writer instead closes the port itself once it has written its pending states.
+    def DetachPort(self):
+        serialPort = self.serialPort
+        writer = self.writer
+        self.serialPort = None
+        self.writer = None
+        self._sentPorts = [None, None, None]
+        if writer is not None:
+            writer.Stop()
+            return None
+        return serialPort
+
     def Connect(self):
         if self.IsConnected():
             return
-        self.serialPort = Serial(self.portInfo.device, baudrate=115200, timeout=0, write_timeout=0)
-        self.serialPort.write(b'!A' + bytes([0]))
-        self.serialPort.write(b'!B' + bytes([0]))
-        self.serialPort.write(b'!C' + bytes([0]))
-        self.serialPort.flush()
+        self.AttachPort(self.OpenPort())
 
     def Disconnect(self):
-        if self.IsConnected():
-            self.serialPort.close()
-        self.serialPort = None
+        serialPort = self.DetachPort()
+        if serialPort is not None:
+            self.ClosePort(serialPort)
 
     def Summary(self):
         return """Name: {}
@@ -143,20 +530,53 @@ class Device:
                    self.portInfo.hwid).replace("    ", "\t").replace("\t", "")
 
 
+# The frame header byte for each of the three 8-solenoid ports of a device.
+PORT_NAMES = b'ABC'
+
+
+# Packs (port, byte) states into [frameBuffer] as consecutive 2-byte frames, and returns a view of
+# the packed frames.
+def PackFrames(portStates: List[Tuple[int, int]], frameBuffer: bytearray) -> memoryview:
+    frameLength = 0
+    for port, portState in portStates:
+        frameBuffer[frameLength] = PORT_NAMES[port]
+        frameBuffer[frameLength + 1] = portState
+        frameLength += 2
+    return memoryview(frameBuffer)[:frameLength]
+
+
+# Packs one-byte pin states (0 or 1) into port bytes, 8 pins per port with pin 0 as the least
+# significant bit. The whole bank is read as one integer, and each 64-bit port lane is multiplied
+# so that its 8 pins land on the 8 bits of the lane's top byte.
+def PackPorts(pinStates) -> List[int]:
+    packed = int.from_bytes(pinStates, 'little')
+    return [((packed >> shift & 0xFFFFFFFFFFFFFFFF) * 0x0102040810204080) >> 56 & 0xFF for shift in
+            range(0, len(pinStates) * 8, 64)]
+
+
+def CheckSolenoidNumber(number: int):
+    if not 0 <= number < MAX_SOLENOIDS:
+        raise Exception("Solenoid number %d is out of range. Solenoids are numbered 0 to %d." %
+                        (number, MAX_SOLENOIDS - 1))
+
+
 def ConvertPinStatesToBytes(state: List[bool]):
-    number = 0
-    for i in range(8):
-        if state[i]:
-            number += 1 << i
-    return bytes([number])
+    return bytes(PackPorts(bytes(state[:8])))
 
 
 def RescanPorts():
     return comports()
 
 
+# Identifies the physical device on a serial port. Ports without a hardware ID are identified by
+# their device path instead.
+def PortKey(portInfo) -> str:
+    return portInfo.hwid if portInfo.hwid != "" else portInfo.device
+
+
 class DummyDevice(Device):
     n = 0
+    writerType = None
 
     class DummyPortInfo:
         def __init__(self):
@@ -182,20 +602,29 @@ class DummyDevice(Device):
     def IsConnected(self):
         return self.connected
 
-    def Connect(self):
+    def OpenPort(self):
         print("Connecting")
+        return self
+
+    def ClosePort(self, serialPort):
+        print("Disconnecting")
+
+    def AttachPort(self, serialPort):
+        super().AttachPort(None)
         self.connected = True
 
+    def DetachPort(self):
+        super().DetachPort()
+        wasConnected = self.connected
+        self.connected = False
+        return self if wasConnected else None
+
     def Flush(self):
         if not self.connected:
             print("ERROR: Not connected!")
         print("Flushing")
 
-    def Disconnect(self):
-        print("Disconnecting")
-        self.connected = False
-
-    def Write(self, data):
+    def WritePort(self, serialPort, data):
         if not self.connected:
             print("ERROR: Not connected!")
-        print(data)
+        print(bytes(data))
@@ -0,0 +1,109 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import List, Tuple, Dict, Any, Optional
+
+
+# The clock used for all program timing. It is monotonic, so it is not affected by changes to the
+# system time, and has sub-microsecond resolution.
+def Now() -> float:
+    return time.perf_counter()
+
+
+# Sleeps until [deadline]. The last [spinThreshold] seconds are spent busy-waiting, as sleeping
+# can overshoot by a scheduler quantum. If [stopEvent] is given, returns False as soon as it is
+# set.
+def SleepUntil(deadline: float, spinThreshold: float = 0.0,
+               stopEvent: Optional[threading.Event] = None) -> bool:
+    remaining = deadline - Now()
+    if remaining > spinThreshold:
+        if stopEvent is None:
+            time.sleep(remaining - spinThreshold)
+        elif stopEvent.wait(remaining - spinThreshold):
+            return False
+    while Now() < deadline:
+        if stopEvent is not None and stopEvent.is_set():
+            return False
+        time.sleep(0)
+    return True
+
+
+# Keeps the times at which each running program function next needs to be ticked, keyed by
+# (compiled program, function symbol). The program worker sleeps until the earliest of these
+# deadlines, or until it is woken because the schedule or the rig states have changed.
+class Scheduler:
+    _instance = None
+
+    def __init__(self):
+        self._condition = threading.Condition()
+
+        # Min-heap of (deadline, sequence number, key) entries. Rescheduling or unscheduling a key
+        # does not remove its old heap entry; instead, only the entry whose sequence number
+        # matches the latest one recorded for the key is considered valid.
+        self._heap: List[Tuple[float, int, Tuple[Any, str]]] = []
+        self._sequences: Dict[Tuple[Any, str], int] = {}
+        self._counter = itertools.count()
+
+        # Set when the waiting thread should return even if nothing is due.
+        self._woken = False
+
+        # If non-zero, WaitForDue busy-waits for deadlines that are closer than this many seconds
+        # rather than sleeping, for precise timing at the cost of CPU time.
+        self.spinThreshold = 0.0
+
+    @staticmethod
+    def Instance():
+        if Scheduler._instance is None:
+            Scheduler._instance = Scheduler()
+        return Scheduler._instance
+
+    # Schedules a function to be ticked at [deadline], replacing any existing deadline for it.
+    def Schedule(self, compiledProgram, functionSymbol: str, deadline: float):
+        with self._condition:
+            key = (compiledProgram, functionSymbol)
+            sequence = next(self._counter)
+            self._sequences[key] = sequence
+            heapq.heappush(self._heap, (deadline, sequence, key))
+            self._condition.notify()
+
+    def Unschedule(self, compiledProgram, functionSymbol: str):
+        with self._condition:
+            self._sequences.pop((compiledProgram, functionSymbol), None)
+
+    def UnscheduleProgram(self, compiledProgram):
+        with self._condition:
+            for key in [k for k in self._sequences if k[0] is compiledProgram]:
+                del self._sequences[key]
+
+    # Makes the current (or next) call to WaitForDue return immediately.
+    def Wake(self):
+        with self._condition:
+            self._woken = True
+            self._condition.notify()
+
+    # Blocks until at least one function is due or the scheduler is woken. Returns the
+    # (compiled program, function symbol) keys that are due, which are removed from the schedule.
+    def WaitForDue(self) -> List[Tuple[Any, str]]:
+        while True:
+            with self._condition:
+                now = Now()
+                due = []
+                while len(self._heap) > 0 and self._heap[0][0] <= now:
+                    deadline, sequence, key = heapq.heappop(self._heap)
+                    if self._sequences.get(key) == sequence:
+                        del self._sequences[key]
+                        due.append(key)
+                if len(due) > 0 or self._woken:
+                    self._woken = False
+                    return due
+                if len(self._heap) == 0:
+                    self._condition.wait()
+                    continue
+                nextDeadline = self._heap[0][0]
+                if nextDeadline - now > self.spinThreshold:
+                    self._condition.wait(nextDeadline - now - self.spinThreshold)
+                    continue
+            # Spin outside of the lock so that the schedule can still be changed meanwhile.
+            while Now() < nextDeadline:
+                time.sleep(0)
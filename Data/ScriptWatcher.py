@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Dict, Optional, Callable, Set
+
+
+# Keeps a version number for each script file that is increased whenever the file changes, so
+# that checking whether a compiled program is out of date is a dictionary lookup.
+#
+# The UI installs a file system watcher through [watchFunction] and reports changes with
+# MarkChanged. Without one (e.g. when running headless), Version checks the file's modification
+# time on every call instead. Files that could not be watched (e.g. because an editor deleted
+# the file while replacing it) are watched again by the next Version call that can, and their
+# version is increased then, as they may have changed in the meantime.
+class ScriptWatcher:
+    _instance = None
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._modTimes: Dict[str, Optional[float]] = {}
+
+        # Called with each path that should be watched for changes. Returns whether the path is
+        # now being watched.
+        self.watchFunction: Optional[Callable[[str], bool]] = None
+        self._unwatched: Set[str] = set()
+
+    @staticmethod
+    def Instance():
+        if ScriptWatcher._instance is None:
+            ScriptWatcher._instance = ScriptWatcher()
+        return ScriptWatcher._instance
+
+    def Version(self, path: Path) -> int:
+        key = str(path)
+        version = self._versions.get(key)
+        if version is None:
+            version = self._versions[key] = 0
+            self._modTimes[key] = ModTime(path)
+            if self.watchFunction is not None and not self.watchFunction(key):
+                self._unwatched.add(key)
+        elif key in self._unwatched:
+            if self.watchFunction is not None and self.watchFunction(key):
+                self._unwatched.discard(key)
+                version = self._versions[key] = version + 1
+        elif self.watchFunction is None:
+            modTime = ModTime(path)
+            if modTime != self._modTimes[key]:
+                self._modTimes[key] = modTime
+                version = self._versions[key] = version + 1
+        return version
+
+    def MarkChanged(self, path: str):
+        key = str(Path(path))
+        if key in self._versions:
+            self._versions[key] += 1
+
+    # Reports that [path] is no longer being watched.
+    def MarkUnwatched(self, path: str):
+        key = str(Path(path))
+        if key in self._versions:
+            self._unwatched.add(key)
+
+
+def ModTime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
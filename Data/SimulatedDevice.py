@@ -0,0 +1,137 @@
+import threading
+from typing import List, Tuple, Optional
+
+from serial import SerialException
+
+from Data.Rig import Device, Rig, PORT_NAMES
+from Data.Scheduler import Now, SleepUntil
+
+
+# Stands in for a serial.Serial connection to a solenoid board. Written frames are decoded as the
+# board would decode them, into a timeline of the board's 24 pin states. Faults can be injected
+# to model a real USB serial link: a baud rate limit, stalled writes and disconnects.
+class SimulatedSerial:
+    def __init__(self, baudRate: Optional[int] = None):
+        self.is_open = True
+
+        # If set, each write blocks for as long as its bytes take to send at this rate (8N1).
+        self.baudRate = baudRate
+        self._lineFreeTime = 0.0
+
+        # The next write blocks for this many extra seconds.
+        self._stallDuration = 0.0
+        # The next write fails and closes the port, as if the board were unplugged.
+        self._disconnectPending = False
+
+        self._condition = threading.Condition()
+        self._partialFrame = b''
+        self.pins = 0
+        self.writeCount = 0
+        self.byteCount = 0
+
+        # (arrival time, 24-bit pin states) after every decoded port frame, and
+        # (arrival time, port, value) for every decoded initialization ('!') frame.
+        self.timeline: List[Tuple[float, int]] = []
+        self.initFrames: List[Tuple[float, int, int]] = []
+
+    def InjectStall(self, duration: float):
+        self._stallDuration += duration
+
+    def InjectDisconnect(self):
+        self._disconnectPending = True
+
+    def write(self, data):
+        if not self.is_open:
+            raise SerialException("Attempting to use a port that is not open")
+        if self._disconnectPending:
+            self._disconnectPending = False
+            self.is_open = False
+            raise SerialException("Write failed: the simulated device was disconnected")
+        data = bytes(data)
+        arrivalTime = Now() + self._stallDuration
+        self._stallDuration = 0.0
+        if self.baudRate is not None:
+            arrivalTime = max(arrivalTime, self._lineFreeTime) + len(data) * 10 / self.baudRate
+            self._lineFreeTime = arrivalTime
+        SleepUntil(arrivalTime)
+        self.Decode(data, arrivalTime)
+        return len(data)
+
+    def Decode(self, data: bytes, arrivalTime: float):
+        with self._condition:
+            self.writeCount += 1
+            self.byteCount += len(data)
+            data = self._partialFrame + data
+            i = 0
+            while i < len(data):
+                if data[i:i + 1] == b'!':
+                    if i + 3 > len(data):
+                        break
+                    self.initFrames.append((arrivalTime, PORT_NAMES.index(data[i + 1]), data[i + 2]))
+                    i += 3
+                elif data[i] in PORT_NAMES:
+                    if i + 2 > len(data):
+                        break
+                    shift = PORT_NAMES.index(data[i]) * 8
+                    self.pins = (self.pins & ~(0xFF << shift)) | (data[i + 1] << shift)
+                    self.timeline.append((arrivalTime, self.pins))
+                    i += 2
+                else:
+                    # Not a frame header. The board skips bytes until it finds one.
+                    i += 1
+            self._partialFrame = data[i:]
+            self._condition.notify_all()
+
+    # Waits until the board's pins equal [pins], and returns the time at which they did, or None
+    # if they did not within [timeout] seconds.
+    def WaitForPins(self, pins: int, timeout: float) -> Optional[float]:
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.pins == pins, timeout):
+                return None
+            return self.timeline[-1][0] if len(self.timeline) > 0 else Now()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class SimulatedPortInfo:
+    def __init__(self, index: int):
+        self.name = "Simulated %d" % index
+        self.device = "SIM%d" % index
+        self.serial_number = "SIM%06d" % index
+        self.location = "Simulated"
+        self.manufacturer = "uChip"
+        self.description = "Simulated solenoid board."
+        self.product = "Simulated device"
+        self.interface = "None"
+        self.hwid = "SIM-%d" % index
+
+
+# A device whose serial port is a SimulatedSerial. The serial port's fault settings are taken from
+# the device when it connects.
+class SimulatedDevice(Device):
+    def __init__(self, index: int = 0, baudRate: Optional[int] = None):
+        super().__init__()
+        self.portInfo = SimulatedPortInfo(index)
+        self.available = True
+        self.baudRate = baudRate
+
+    def OpenPort(self):
+        serialPort = SimulatedSerial(self.baudRate)
+        serialPort.write(b'!A' + bytes([0]) + b'!B' + bytes([0]) + b'!C' + bytes([0]))
+        return serialPort
+
+
+# Builds a rig of [boardCount] enabled and connected simulated boards, numbered consecutively.
+def SimulatedRig(boardCount: int, baudRate: Optional[int] = None) -> Rig:
+    rig = Rig()
+    for i in range(boardCount):
+        device = SimulatedDevice(i, baudRate)
+        device.enabled = True
+        device.startNumber = i * 24
+        rig.allDevices.append(device)
+        rig.ConnectDevice(device)
+    return rig
@@ -51,10 +51,15 @@ def SetColor(c, m, y, k):
     yellow = [bool(x == '1') for x in format(y, '08b')]
     key = [bool(x == '1') for x in format(k, '08b')]
     chip = Chip()
-    [[c.SetOpen(x), v.SetOpen(not x)] for (c, v, x) in zip(chip.cyans, chip.cyans_v, cyan)]
-    [[c.SetOpen(x), v.SetOpen(not x)] for (c, v, x) in zip(chip.magentas, chip.magentas_v, magenta)]
-    [[c.SetOpen(x), v.SetOpen(not x)] for (c, v, x) in zip(chip.yellows, chip.yellows_v, yellow)]
-    [[c.SetOpen(x), v.SetOpen(not x)] for (c, v, x) in zip(chip.keys, chip.keys_v, key)]
+    states = {}
+    for (dyes, vehicles, bits) in ((chip.cyans, chip.cyans_v, cyan),
+                                   (chip.magentas, chip.magentas_v, magenta),
+                                   (chip.yellows, chip.yellows_v, yellow),
+                                   (chip.keys, chip.keys_v, key)):
+        for (c, v, x) in zip(dyes, vehicles, bits):
+            states[c] = x
+            states[v] = not x
+    SetValves(states)
 
 
 def PollColor():
@@ -106,6 +106,7 @@ class ChipView(QWidget):
         newValve.name = "Valve " + str(highestValveNumber + 1)
         newValve.solenoidNumber = highestValveNumber + 1
         UIMaster.Instance().currentChip.valves.append(newValve)
+        UIMaster.Instance().currentChip.InvalidateLookup()
         newValveItem = ValveItem.ValveItem(newValve)
         self.graphicsView.AddItems([newValveItem])
         self.graphicsView.CenterItem(newValveItem)
@@ -138,6 +139,7 @@ class ChipView(QWidget):
         newProgram = Program(script)
         newProgram.name = script.Name()
         UIMaster.Instance().currentChip.programs.append(newProgram)
+        UIMaster.Instance().currentChip.InvalidateLookup()
         newProgramItem = ProgramItem.ProgramItem(newProgram)
         self.graphicsView.AddItems([newProgramItem])
         self.graphicsView.CenterItem(newProgramItem)
@@ -9,6 +9,9 @@ from UI.UIMaster import UIMaster
 
 
 class ImageItem(CustomGraphicsViewItem):
+    # Polled so that changes to the image file are picked up.
+    pollInterval = 1.0
+
     def __init__(self, image: Image):
         self.image = image
 
@@ -47,6 +50,7 @@ class ImageItem(CustomGraphicsViewItem):
         path = self.Browse(self.imageWidget)
         if path:
             self.image.path = path
+            self.MarkDirty()
 
     def RecordChanges(self):
         if self.isUpdating:
@@ -56,6 +60,7 @@ class ImageItem(CustomGraphicsViewItem):
         rect = self.GetRect()
         self.image.rect = [rect.x(), rect.y(), rect.width(), rect.height()]
         UIMaster.Instance().modified = True
+        self.MarkDirty()
 
     def Update(self):
         try:
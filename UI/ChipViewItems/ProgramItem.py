@@ -1,9 +1,10 @@
+import collections
 import traceback
 import typing
 import pathlib
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QFormLayout, QLineEdit, \
-    QSpinBox, QDoubleSpinBox, QComboBox, QFileDialog, QGridLayout, QHBoxLayout, QScrollArea, QFrame, QSizePolicy
-from PySide6.QtCore import QRectF, Signal, Qt
+    QSpinBox, QDoubleSpinBox, QComboBox, QFileDialog, QGridLayout, QHBoxLayout, QListView, QFrame, QSizePolicy
+from PySide6.QtCore import QRectF, Signal, Qt, QAbstractListModel, QModelIndex
 from PySide6.QtGui import QIcon, QColor, QPixmap
 
 import ucscript
@@ -12,7 +13,7 @@ from UI.CustomGraphicsView import CustomGraphicsViewItem
 from UI.ScriptBrowser import ScriptBrowser
 from Data.Chip import Program, Script
 from Data.ProgramCompilation import IsTypeValidList, IsTypeValidOptions, DoTypesMatch, \
-    NoneValueForType, Message
+    NoneValueForType, Message, MessageLog
 
 
 class ColoredIcon(QIcon):
@@ -26,6 +27,9 @@ class ColoredIcon(QIcon):
 
 # The most complicated/involved chip item. Lots of components!
 class ProgramItem(CustomGraphicsViewItem):
+    # Polled, as messages and running functions change from the program worker thread.
+    pollInterval = 0.1
+
     def __init__(self, program: Program):
 
         self.shownIcon = ColoredIcon("Assets/Images/Visible.png", QColor(100, 100, 100))
@@ -111,6 +115,14 @@ class ProgramItem(CustomGraphicsViewItem):
         # Widget sets for each function
         self.functionWidgetSets: typing.List[FunctionWidgetSet] = []
 
+        # The compiled program and generation that the widget sets were built for, and the chip
+        # version that the value widgets were last refreshed for. The widget sets are only rebuilt
+        # when the program is recompiled.
+        self.shownProgram = None
+        self.shownGeneration = None
+        self.shownChip = None
+        self.shownChipVersion = None
+
         # Actual item widget
         itemWidget = ProgramItem.ResizeDelegate(self.OnResized)
         itemWidget.setObjectName("itemWidget")
@@ -174,7 +186,7 @@ class ProgramItem(CustomGraphicsViewItem):
 
     def ClearMessages(self):
         compiled = UIMaster.GetCompiledProgram(self.program)
-        compiled.messages = [m for m in compiled.messages if m.messageType == Message.ERROR_CT]
+        compiled.messages.Filter(lambda m: m.messageType == Message.ERROR_CT)
 
     def SetEnabled(self, state):
         for c in self.itemProxy.widget().children():
@@ -194,8 +206,11 @@ class ProgramItem(CustomGraphicsViewItem):
         if self.isUpdating:
             return
 
-        # Store the program name and widget size.
-        self.program.name = self.nameField.text()
+        # Store the program name and widget size. The chip's name lookup only needs rebuilding
+        # when the name changes.
+        if self.program.name != self.nameField.text():
+            self.program.name = self.nameField.text()
+            UIMaster.Instance().currentChip.InvalidateLookup()
         rect = self.GetRect()
         self.program.position = [rect.x(), rect.y()]
 
@@ -208,6 +223,7 @@ class ProgramItem(CustomGraphicsViewItem):
         self.program.scale = self.scaleWidget.value()
 
         UIMaster.Instance().modified = True
+        self.MarkDirty()
 
     def Update(self):
         # Called regularly to make sure that the fields match the backing program.
@@ -227,19 +243,51 @@ class ProgramItem(CustomGraphicsViewItem):
         if self.scaleWidget.value() != self.program.scale:
             self.scaleWidget.setValue(self.program.scale)
 
+        rebuild = compiled is not self.shownProgram or compiled.generation != self.shownGeneration
+        self.shownProgram = compiled
+        self.shownGeneration = compiled.generation
+
+        # Valve and program names are shown in value widgets, so these are refreshed when the
+        # chip changes.
+        chip = UIMaster.Instance().currentChip
+        refreshValues = rebuild or chip is not self.shownChip or \
+            chip.version != self.shownChipVersion
+        self.shownChip = chip
+        self.shownChipVersion = chip.version
+
         # Update the parameter and function widgets. These are complicated, so they have their own
         # methods for clarity.
-        self.UpdateParameters()
-        self.UpdateFunctions()
+        self.UpdateParameters(compiled, rebuild, refreshValues)
+        self.UpdateFunctions(compiled, rebuild)
 
         self.itemProxy.adjustSize()
         self.itemProxy.setScale(self.program.scale)
         self.UpdateGeometry()
 
-    def UpdateParameters(self):
-        # Get the latest compiled program version
-        compiled = UIMaster.GetCompiledProgram(self.program)
+    def UpdateParameters(self, compiled, rebuild: bool, refreshValues: bool):
+        if rebuild:
+            self.RebuildParameters(compiled)
 
+        # Only values and visibilities that have changed are set.
+        for parameterSymbol, parameterWidgetSet in zip(compiled.parameters,
+                                                       self.parameterWidgetSets):
+            value = self.program.parameterValues[parameterSymbol]
+            if refreshValues or value != parameterWidgetSet.shownValue:
+                parameterWidgetSet.inspectorValueWidget.SetValue(value)
+                parameterWidgetSet.itemValueWidget.SetValue(value)
+                # Lists are copied, as they may be changed in place.
+                parameterWidgetSet.shownValue = value.copy() if isinstance(value, list) else value
+
+            visible = self.program.parameterVisibility[parameterSymbol]
+            if visible != parameterWidgetSet.shownVisibility:
+                parameterWidgetSet.inspectorVisibilityToggle.setIcon(
+                    self.shownIcon if visible else self.hiddenIcon)
+                parameterWidgetSet.inspectorVisibilityToggle.setChecked(visible)
+                parameterWidgetSet.itemNameLabel.setVisible(visible)
+                parameterWidgetSet.itemValueWidget.setVisible(visible)
+                parameterWidgetSet.shownVisibility = visible
+
+    def RebuildParameters(self, compiled):
         # Make sure we have the right number of parameter widget sets in the layout. First, add
         # needed widget sets.
         for i in range(len(self.parameterWidgetSets), len(compiled.parameters)):
@@ -258,12 +306,12 @@ class ProgramItem(CustomGraphicsViewItem):
             newSet.inspectorVisibilityToggle.toggled.connect(self.RecordChanges)
 
         # Then, remove excessive widget sets
-        for i in range(len(compiled.parameters), len(self.parameterWidgetSets)):
-            self.parameterWidgetSets[i - 1].inspectorNameLabel.deleteLater()
-            self.parameterWidgetSets[i - 1].inspectorVisibilityToggle.deleteLater()
-            self.parameterWidgetSets[i - 1].itemNameLabel.deleteLater()
-            self.parameterWidgetSets[i - 1].inspectorValueWidget.deleteLater()
-            self.parameterWidgetSets[i - 1].itemValueWidget.deleteLater()
+        for parameterWidgetSet in self.parameterWidgetSets[len(compiled.parameters):]:
+            parameterWidgetSet.inspectorNameLabel.deleteLater()
+            parameterWidgetSet.inspectorVisibilityToggle.deleteLater()
+            parameterWidgetSet.itemNameLabel.deleteLater()
+            parameterWidgetSet.inspectorValueWidget.deleteLater()
+            parameterWidgetSet.itemValueWidget.deleteLater()
         self.parameterWidgetSets = self.parameterWidgetSets[:len(compiled.parameters)]
 
         # Update widget sets. Enumerated so that we know where each widget is in the layout in case
@@ -303,30 +351,40 @@ class ProgramItem(CustomGraphicsViewItem):
                 self.parametersLayout.addWidget(inspectorWidget, i, 1)
                 self.visibleParametersLayout.addWidget(itemWidget, i, 1)
 
-            # Set the values to be the current value.
-            parameterWidgetSet.inspectorValueWidget.SetValue(
-                self.program.parameterValues[parameterSymbol])
-            parameterWidgetSet.itemValueWidget.SetValue(
-                self.program.parameterValues[parameterSymbol])
-
-            # Set name fields and visibility
+            # Set name fields. Values and visibility are set again after every rebuild.
             parameterWidgetSet.itemNameLabel.setText(
                 compiled.parameters[parameterSymbol].displayName)
             parameterWidgetSet.inspectorNameLabel.setText(
                 compiled.parameters[parameterSymbol].displayName)
-            parameterWidgetSet.inspectorVisibilityToggle.setIcon(
-                self.shownIcon if self.program.parameterVisibility[parameterSymbol] else self.hiddenIcon)
-            parameterWidgetSet.inspectorVisibilityToggle.setChecked(
-                self.program.parameterVisibility[parameterSymbol])
-            parameterWidgetSet.itemNameLabel.setVisible(
-                self.program.parameterVisibility[parameterSymbol])
-            parameterWidgetSet.itemValueWidget.setVisible(
-                self.program.parameterVisibility[parameterSymbol])
-
-    def UpdateFunctions(self):
-        # Get the latest compiled program version
-        compiled = UIMaster.GetCompiledProgram(self.program)
+            parameterWidgetSet.shownVisibility = None
+
+    def UpdateFunctions(self, compiled, rebuild: bool):
+        if rebuild:
+            self.RebuildFunctions(compiled)
 
+        # Only the running state of functions changes between compilations.
+        for functionSymbol, functionWidgetSet in zip(compiled.showableFunctions,
+                                                     self.functionWidgetSets):
+            functionInfo = compiled.asyncFunctions.get(functionSymbol)
+            if functionInfo is None:
+                state = "Stopped"
+            else:
+                state = "Paused" if functionInfo.paused else "Running"
+            if state != functionWidgetSet.shownState:
+                functionWidgetSet.startButton.setVisible(state == "Stopped")
+                functionWidgetSet.label.setVisible(state != "Stopped")
+                functionWidgetSet.stopButton.setVisible(state != "Stopped")
+                functionWidgetSet.pauseButton.setVisible(state == "Running")
+                functionWidgetSet.resumeButton.setVisible(state == "Paused")
+                functionWidgetSet.shownState = state
+            if functionInfo is not None:
+                # Report the achieved iteration rate and how late waits are being resumed.
+                functionWidgetSet.label.setToolTip(
+                    "Rate: %.1f Hz\nTiming error: %.2f ms mean, %.2f ms max, %.2f ms last" % (
+                        functionInfo.IterationRate(), functionInfo.MeanTimingError() * 1000,
+                        functionInfo.maxTimingError * 1000, functionInfo.lastTimingError * 1000))
+
+    def RebuildFunctions(self, compiled):
         # Make sure we have the right number of function widget sets in the layout. First, add
         # needed widget sets.
         def AddFunctionWidgetSet(index: int):
@@ -338,23 +396,21 @@ class ProgramItem(CustomGraphicsViewItem):
             self.functionsLayout.addWidget(newSet.pauseButton, index, 7)
             self.functionsLayout.addWidget(newSet.resumeButton, index, 7)
             newSet.startButton.clicked.connect(lambda: self.StartFunction(index))
-            newSet.stopButton.clicked.connect(
-                lambda: compiled.programFunctions[compiled.showableFunctions[index]].Stop())
-            newSet.pauseButton.clicked.connect(
-                lambda: compiled.programFunctions[compiled.showableFunctions[index]].Pause())
-            newSet.resumeButton.clicked.connect(
-                lambda: compiled.programFunctions[compiled.showableFunctions[index]].Resume())
+            newSet.stopButton.clicked.connect(lambda: self.GetFunction(index).Stop())
+            newSet.pauseButton.clicked.connect(lambda: self.GetFunction(index).Pause())
+            newSet.resumeButton.clicked.connect(lambda: self.GetFunction(index).Resume())
 
         for i in range(len(self.functionWidgetSets), len(compiled.showableFunctions)):
             AddFunctionWidgetSet(i)
 
         # Remove excessive widget sets
-        for i in range(len(compiled.showableFunctions), len(self.functionWidgetSets)):
-            self.functionWidgetSets[i - 1].startButton.deleteLater()
-            self.functionWidgetSets[i - 1].stopButton.deleteLater()
-            self.functionWidgetSets[i - 1].pauseButton.deleteLater()
-            self.functionWidgetSets[i - 1].resumeButton.deleteLater()
-        self.functionWidgetSets = self.functionWidgetSets[:len(self.functionWidgetSets)]
+        for functionWidgetSet in self.functionWidgetSets[len(compiled.showableFunctions):]:
+            functionWidgetSet.startButton.deleteLater()
+            functionWidgetSet.label.deleteLater()
+            functionWidgetSet.stopButton.deleteLater()
+            functionWidgetSet.pauseButton.deleteLater()
+            functionWidgetSet.resumeButton.deleteLater()
+        self.functionWidgetSets = self.functionWidgetSets[:len(compiled.showableFunctions)]
 
         # Update widget sets
         for functionSymbol, functionWidgetSet in zip(compiled.showableFunctions,
@@ -362,19 +418,14 @@ class ProgramItem(CustomGraphicsViewItem):
             functionWidgetSet.startButton.setText(
                 compiled.programFunctions[functionSymbol].functionName)
             functionWidgetSet.label.setText(compiled.programFunctions[functionSymbol].functionName)
-            functionWidgetSet.startButton.setVisible(functionSymbol not in compiled.asyncFunctions)
-            functionWidgetSet.label.setVisible(functionSymbol in compiled.asyncFunctions)
-            functionWidgetSet.stopButton.setVisible(functionSymbol in compiled.asyncFunctions)
-            functionWidgetSet.pauseButton.setVisible(functionSymbol in compiled.asyncFunctions and
-                                                     not compiled.asyncFunctions[
-                                                         functionSymbol].paused)
-            functionWidgetSet.resumeButton.setVisible(functionSymbol in compiled.asyncFunctions and
-                                                      compiled.asyncFunctions[
-                                                          functionSymbol].paused)
+            functionWidgetSet.shownState = None
 
-    def StartFunction(self, index):
+    def GetFunction(self, index):
         compiled = UIMaster.GetCompiledProgram(self.program)
-        compiled.programFunctions[compiled.showableFunctions[index]]()
+        return compiled.programFunctions[compiled.showableFunctions[index]]
+
+    def StartFunction(self, index):
+        self.GetFunction(index)()
 
     def Duplicate(self):
         newProgram = Program()
@@ -384,15 +435,19 @@ class ProgramItem(CustomGraphicsViewItem):
         newProgram.parameterValues = self.program.parameterValues.copy()
         newProgram.parameterVisibility = self.program.parameterVisibility.copy()
         UIMaster.Instance().currentChip.programs.append(newProgram)
+        UIMaster.Instance().currentChip.InvalidateLookup()
         UIMaster.Instance().modified = True
         return ProgramItem(newProgram)
 
     def SetRect(self, rect: QRectF):
         super().SetRect(QRectF(rect))
-        self.RecordChanges()
+        # Only the position changes, which only this item shows.
+        self.program.position = [rect.x(), rect.y()]
+        UIMaster.Instance().modified = True
 
     def OnRemoved(self):
         UIMaster.Instance().currentChip.programs.remove(self.program)
+        UIMaster.Instance().currentChip.InvalidateLookup()
         UIMaster.Instance().RemoveProgram(self.program)
         UIMaster.Instance().modified = True
 
@@ -421,6 +476,10 @@ class ParameterWidgetSet:
         self.itemValueWidget = ParameterValueWidget()
         self.itemNameLabel = QLabel()
 
+        # The value and visibility that the widgets currently show.
+        self.shownValue = None
+        self.shownVisibility = None
+
 
 # Convenience structure that stores the widgets for a single program function.
 class FunctionWidgetSet:
@@ -470,6 +529,9 @@ class FunctionWidgetSet:
         self.resumeButton.setFixedWidth(50)
         self.stopButton.setFixedWidth(50)
 
+        # The running state that the widgets currently show.
+        self.shownState = None
+
 
 # Control widget for a UI-editable parameter.
 class ParameterValueWidget(QWidget):
@@ -606,48 +668,91 @@ class ParameterValueWidget(QWidget):
         self._updating = False
 
 
-class MessageArea(QScrollArea):
+# Shows the messages of a program. The view only creates widgets for visible rows, and new
+# messages are appended to the model rather than rebuilding it.
+class MessageArea(QListView):
     def __init__(self):
         super().__init__()
-
-        scrollContents = QWidget()
-        self.setWidget(scrollContents)
-        self.setWidgetResizable(True)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.messageLayout = QVBoxLayout()
-        self.messageLayout.setAlignment(Qt.AlignTop)
-        self.messageLayout.setContentsMargins(0, 0, 0, 0)
-        self.messageLayout.setSpacing(0)
-        scrollContents.setLayout(self.messageLayout)
+        self.setUniformItemSizes(False)
+        self.setWordWrap(True)
+        self.setStyleSheet("QListView::item { padding: 5px; }")
+        self.messageModel = MessageListModel()
+        self.setModel(self.messageModel)
+        self.setMinimumWidth(200)
 
         self.verticalScrollBar().rangeChanged.connect(self.ScrollToBottom)
-        self.lastMessages = None
-        self.labels = []
-        self.Update([])
 
     def ScrollToBottom(self):
         self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
 
-    def Update(self, messages):
-        if messages == self.lastMessages:
-            return
+    def Update(self, messages: MessageLog):
+        newMessages = self.messageModel.Update(messages)
+        if newMessages:
+            # Grow to fit the widest line of the new messages.
+            lines = [line for message in newMessages for line in message.text.splitlines()]
+            widest = max([self.fontMetrics().horizontalAdvance(line) for line in lines], default=0)
+            if widest + 30 > self.minimumWidth():
+                self.setMinimumWidth(widest + 30)
 
-        [label.deleteLater() for label in self.labels]
-        self.labels = []
-        self.lastMessages = messages.copy()
 
-        maxWidth = 200
-        for i, message in enumerate(self.lastMessages):
-            newEntry = QLabel(message.text)
+class MessageListModel(QAbstractListModel):
+    def __init__(self):
+        super().__init__()
+        self.messages = collections.deque()
+        # The number of the first message in the model, counting every message ever logged.
+        self.firstNumber = 0
+        # The message log being shown and the counts that the model has caught up to.
+        self.log: typing.Optional[MessageLog] = None
+        self.totalCount = 0
+        self.resetCount = 0
+
+    # Brings the model up to date with [log] and returns the messages that were added.
+    def Update(self, log: MessageLog) -> typing.List[Message]:
+        if log is self.log and log.totalCount == self.totalCount and \
+                log.resetCount == self.resetCount:
+            return []
+        messages, totalCount, resetCount = log.Snapshot()
+        if log is not self.log or resetCount != self.resetCount:
+            self.beginResetModel()
+            self.messages = collections.deque(messages)
+            self.firstNumber = totalCount - len(messages)
+            self.endResetModel()
+            added = messages
+        else:
+            added = messages[len(messages) - min(totalCount - self.totalCount, len(messages)):]
+            # Drop the rows that the log has dropped.
+            dropped = len(self.messages) + len(added) - len(messages)
+            if dropped > 0:
+                self.beginRemoveRows(QModelIndex(), 0, dropped - 1)
+                for _ in range(dropped):
+                    self.messages.popleft()
+                self.firstNumber += dropped
+                self.endRemoveRows()
+            if added:
+                self.beginInsertRows(QModelIndex(), len(self.messages),
+                                     len(self.messages) + len(added) - 1)
+                self.messages.extend(added)
+                self.endInsertRows()
+        self.log = log
+        self.totalCount = totalCount
+        self.resetCount = resetCount
+        return added
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.messages):
+            return None
+        message = self.messages[index.row()]
+        if role == Qt.DisplayRole:
+            return message.text
+        if role == Qt.BackgroundRole:
+            # Striped by message number, so that the stripes stay put as old messages are dropped.
+            striped = (self.firstNumber + index.row()) % 2 == 1
             if message.messageType == Message.MESSAGE:
-                bgColor = "#FFFFFF" if i % 2 == 0 else "#CCCCCC"
-            else:
-                bgColor = "#FFCCCC" if i % 2 == 0 else "#FFAAAA"
-            newEntry.setStyleSheet("""
-            padding: 5px;
-            background-color: """ + bgColor)
-            self.labels.append(newEntry)
-            self.messageLayout.addWidget(newEntry)
-            maxWidth = max(maxWidth, newEntry.sizeHint().width())
-        self.setMinimumWidth(maxWidth)
+                return QColor("#CCCCCC" if striped else "#FFFFFF")
+            return QColor("#FFAAAA" if striped else "#FFCCCC")
+        return None
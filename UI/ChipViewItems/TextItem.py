@@ -45,6 +45,7 @@ class TextItem(CustomGraphicsViewItem):
         c = self.buttonColor
         self.text.color = (c.red(), c.green(), c.blue())
         UIMaster.Instance().modified = True
+        self.MarkDirty()
 
     def PickColor(self):
         colorPicker = QColorDialog(QColor(*self.text.color),
@@ -45,6 +45,8 @@ class ValveItem(CustomGraphicsViewItem):
         self.valveWidget.clicked.connect(self.Toggle)
         self.valveWidget.setMinimumSize(100, 100)
         self._displayState = None
+        # The (text, size) that the font was last fitted to.
+        self._fittedFor = None
 
         # The inspector just holds a name and a spinbox for solenoid number
         inspectorWidget = QWidget()
@@ -68,6 +70,8 @@ class ValveItem(CustomGraphicsViewItem):
     def OnResized(self, event):
         self.fadeWidget.move(0, 0)
         self.fadeWidget.setFixedSize(self.itemProxy.widget().size())
+        # The font is fitted to the widget size.
+        self.MarkDirty()
 
     def SetEnabled(self, state):
         super().SetEnabled(state)
@@ -85,12 +89,15 @@ class ValveItem(CustomGraphicsViewItem):
     # Changes to the valve shape should be recorded.
     def SetRect(self, rect):
         super().SetRect(rect)
-        self.RecordChanges()
+        # Only the geometry changes, which only this item shows.
+        self.valve.rect = [rect.x(), rect.y(), rect.width(), rect.height()]
+        UIMaster.Instance().modified = True
 
     # Called when the valve is removed from the scene (either by the user or through loading a new
     # chip project.
     def OnRemoved(self) -> bool:
         UIMaster.Instance().currentChip.valves.remove(self.valve)
+        UIMaster.Instance().currentChip.InvalidateLookup()
         UIMaster.Instance().modified = True
         return True
 
@@ -110,9 +117,13 @@ class ValveItem(CustomGraphicsViewItem):
             newValve.name = self.valve.name
             newValve.solenoidNumber = highestValveNumber + 1
         UIMaster.Instance().currentChip.valves.append(newValve)
+        UIMaster.Instance().currentChip.InvalidateLookup()
         UIMaster.Instance().modified = True
         return ValveItem(newValve)
 
+    def WatchedSolenoids(self):
+        return self.valve.solenoidNumber,
+
     def Toggle(self):
         r = UIMaster.Instance().rig
         r.SetSolenoidState(self.valve.solenoidNumber,
@@ -121,8 +132,12 @@ class ValveItem(CustomGraphicsViewItem):
     def RecordChanges(self):
         if self.isUpdating:
             return
-        self.valve.name = self.nameField.text()
-        self.valve.solenoidNumber = self.numberField.value()
+        if self.valve.name != self.nameField.text():
+            self.valve.name = self.nameField.text()
+            UIMaster.Instance().currentChip.InvalidateLookup()
+        if self.valve.solenoidNumber != self.numberField.value():
+            self.valve.solenoidNumber = self.numberField.value()
+            UIMaster.Instance().currentChip.MarkChanged()
         self.valve.rect = [self.GetRect().x(), self.GetRect().y(),
                            self.GetRect().width(), self.GetRect().height()]
         UIMaster.Instance().modified = True
@@ -139,9 +154,11 @@ class ValveItem(CustomGraphicsViewItem):
 
         r = self.valveWidget.rect().size()
         r.setHeight(r.height() / 2)
-        font = Utilities.ComputeAutofit(self.valveWidget.font(), r, self.valveWidget.text())
-        if self.valveWidget.font().pixelSize() != font.pixelSize():
-            self.valveWidget.setFont(font)
+        if self._fittedFor != (text, r):
+            self._fittedFor = (text, r)
+            font = Utilities.ComputeAutofit(self.valveWidget.font(), r, text)
+            if self.valveWidget.font().pixelSize() != font.pixelSize():
+                self.valveWidget.setFont(font)
         currentState = UIMaster.Instance().rig.GetSolenoidState(self.valve.solenoidNumber)
         if currentState != self._displayState:
             self._displayState = currentState
@@ -1,11 +1,12 @@
 import weakref
-from typing import List, Optional
+from typing import List, Optional, Callable, Iterable
 from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QWidget, QGraphicsProxyWidget, \
     QGraphicsRectItem, \
     QVBoxLayout, QLabel, QFrame
 from PySide6.QtGui import QPen, QColor, QPainter, QBrush, QTransform, QGuiApplication, QPalette
-from PySide6.QtCore import Qt, QPointF, QSizeF, QRectF, QLineF, QRect, QMarginsF, QPoint, QTimer
+from PySide6.QtCore import Qt, QPointF, QSizeF, QRectF, QLineF, QRect, QMarginsF, QPoint
 from UI.UIMaster import UIMaster
+from UI.UpdateDispatcher import UpdateDispatcher
 from enum import Enum, auto
 from functools import reduce
 
@@ -19,6 +20,13 @@ class CustomGraphicsViewState(Enum):
 
 
 class CustomGraphicsViewItem:
+    # Items are updated by the UpdateDispatcher while they are in a view. Items that show
+    # solenoid states set [WatchedSolenoids] to a function returning the solenoid numbers that
+    # they show, and are updated when those change. Items that show state that does not report
+    # its changes are polled every [pollInterval] seconds.
+    WatchedSolenoids: Optional[Callable[[], Iterable[int]]] = None
+    pollInterval: Optional[float] = None
+
     def __init__(self, name, itemWidget: QWidget, inspectorWidget: QWidget = None):
         self.itemProxy = QGraphicsProxyWidget()
         self.itemProxy.setWidget(itemWidget)
@@ -34,9 +42,6 @@ class CustomGraphicsViewItem:
             widget.layout().addWidget(inspectorWidget)
             self.inspectorProxy.setWidget(widget)
         self.borderRectItem = QGraphicsRectItem()
-        self.updateTimer = QTimer(self.itemProxy)
-        self.updateTimer.timeout.connect(self._Update)
-        self.updateTimer.start(100)
         self.isResizable = True
         self.isUpdating = False
         self._Update()
@@ -52,6 +57,10 @@ class CustomGraphicsViewItem:
     def Update(self):
         pass
 
+    # Requests an update in the next frame, e.g. after the item's model has been changed.
+    def MarkDirty(self):
+        UpdateDispatcher.Instance().MarkDirty(self._Update)
+
     def GetRect(self):
         return self.itemProxy.sceneBoundingRect()
 
@@ -59,6 +68,7 @@ class CustomGraphicsViewItem:
         self.itemProxy.setPos(rect.topLeft())
         self.itemProxy.resize(rect.size())
         self.UpdateGeometry()
+        self.MarkDirty()
 
     def UpdateGeometry(self):
         rect = self.GetRect()
@@ -144,9 +154,8 @@ class CustomGraphicsView(QGraphicsView):
         self.UpdateInspectors()
         self.UpdateCursor()
 
-        self.updateTimer = QTimer(self)
-        self.updateTimer.timeout.connect(self.Update)
-        self.updateTimer.start(100)
+        # Item geometry can change as items update, so the selection display is polled.
+        UpdateDispatcher.Instance().Register(self.Update, pollInterval=0.1)
 
     def Clear(self):
         self.DeleteItems(self.allItems.copy())
@@ -324,6 +333,7 @@ class CustomGraphicsView(QGraphicsView):
             if i.inspectorProxy is not None:
                 i.inspectorProxy.setVisible(False)
             z += 2
+            UpdateDispatcher.Instance().Register(i._Update, i.WatchedSolenoids, i.pollInterval)
 
     def CenterItem(self, item: CustomGraphicsViewItem):
         r = item.GetRect()
@@ -333,6 +343,7 @@ class CustomGraphicsView(QGraphicsView):
 
     def DeleteItems(self, items: List[CustomGraphicsViewItem]):
         for i in items:
+            UpdateDispatcher.Instance().Unregister(i._Update)
             self.allItems.remove(i)
             self.scene().removeItem(i.borderRectItem)
             self.scene().removeItem(i.itemProxy)
@@ -1,7 +1,10 @@
 import threading
 import time
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from pathlib import Path
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, \
+    QHBoxLayout, QPushButton, QFileDialog, QCheckBox, QHeaderView
 from PySide6.QtCore import QTimer
+from Data.Latency import LatencyRecorder
 
 
 class DebugWindow(QWidget):
@@ -27,3 +30,65 @@ class DebugWindow(QWidget):
 
         self.label.setText(db(self.target, 0))
         self.adjustSize()
+
+
+# Shows the valve actuation latency histograms of each device, from a state being set to its
+# frame being written to the serial port.
+class LatencyPanel(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Latency Statistics")
+        self.setLayout(QVBoxLayout())
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(7)
+        self.table.setHorizontalHeaderLabels(["Device", "Stage", "Count", "Mean (ms)",
+                                              "p50 (ms)", "p99 (ms)", "Max (ms)"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.layout().addWidget(self.table)
+
+        buttonsLayout = QHBoxLayout()
+        self.enabledBox = QCheckBox("Record")
+        self.enabledBox.setChecked(LatencyRecorder.Instance().enabled)
+        self.enabledBox.toggled.connect(self.SetEnabled)
+        resetButton = QPushButton("Reset")
+        resetButton.clicked.connect(self.Reset)
+        exportButton = QPushButton("Export CSV...")
+        exportButton.clicked.connect(self.ExportCSV)
+        buttonsLayout.addWidget(self.enabledBox)
+        buttonsLayout.addStretch(1)
+        buttonsLayout.addWidget(resetButton)
+        buttonsLayout.addWidget(exportButton)
+        self.layout().addLayout(buttonsLayout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.Update)
+        self.timer.start(1000)
+        self.resize(700, 400)
+        self.Update()
+
+    @staticmethod
+    def SetEnabled(enabled: bool):
+        LatencyRecorder.Instance().enabled = enabled
+
+    def Reset(self):
+        LatencyRecorder.Instance().Reset()
+        self.Update()
+
+    def ExportCSV(self):
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Latency Histograms", "",
+                                                  "CSV files (*.csv)")
+        if filename:
+            LatencyRecorder.Instance().ExportCSV(Path(filename))
+
+    def Update(self):
+        if not self.isVisible():
+            return
+        rows = LatencyRecorder.Instance().Summary()
+        self.table.setRowCount(len(rows))
+        for rowNumber, (deviceName, stageName, count, mean, p50, p99, maximum) in enumerate(rows):
+            texts = [deviceName, stageName, str(count)] + ["%.3f" % (value * 1000) for value in
+                                                           (mean, p50, p99, maximum)]
+            for column, text in enumerate(texts):
+                self.table.setItem(rowNumber, column, QTableWidgetItem(text))
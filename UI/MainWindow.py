@@ -4,13 +4,16 @@ import PySide6
 import typing
 from PySide6.QtWidgets import QMainWindow, QTabWidget, QWidget, QMenuBar, QFileDialog, \
     QMessageBox, QHBoxLayout, QPushButton, QSizePolicy, QProxyStyle, QStyle
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, QEvent
 from PySide6.QtGui import QIcon, QKeySequence
 from UI.ChipView import ChipView
 from UI.RigView import RigView
 from UI.UIMaster import UIMaster
 from UI.ProgramWorker import ProgramWorker
-from UI.USBWorker import USBWorker
+from UI.USBWorker import USBWorker, AsyncioUSBWorker
+from UI.DebugWindow import LatencyPanel
+from UI.UpdateDispatcher import UpdateDispatcher
+from Data.AsyncioBackend import AsyncioBackend
 from Data.FileIO import SaveObject, LoadObject
 from Data.Chip import Chip
 
@@ -31,6 +34,7 @@ class MainWindow(QMainWindow):
         self.resize(1600, 900)
 
         self.rigView = RigView()
+        self.latencyPanel: typing.Optional[LatencyPanel] = None
         self.dockPositions = {self.rigView: Qt.RightDockWidgetArea}
 
         self.BuildMenu()
@@ -53,7 +57,7 @@ class MainWindow(QMainWindow):
         l.addWidget(self.rigView, stretch=0)
 
         self.programWorker = ProgramWorker(5.0)
-        self.usbWorker = USBWorker()
+        self.usbWorker = AsyncioUSBWorker() if AsyncioBackend.IsInstalled() else USBWorker()
         watchdogTimer = QTimer(self)
         watchdogTimer.timeout.connect(self.CheckForTimeout)
         watchdogTimer.start(1000)
@@ -64,6 +68,12 @@ class MainWindow(QMainWindow):
 
         self.setStyleSheet(UIMaster.StyleSheet())
 
+    def ShowLatencyPanel(self):
+        if self.latencyPanel is None:
+            self.latencyPanel = LatencyPanel()
+        self.latencyPanel.show()
+        self.latencyPanel.raise_()
+
     def ToggleRig(self):
         self.rigView.setHidden(not self.rigView.isHidden())
         self.toggleButton.setText("<" if self.rigView.isHidden() else ">")
@@ -134,14 +144,28 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         if self.PromptCloseChip():
             super().closeEvent(event)
-            self.programWorker.doStop = True
-            self.usbWorker.doStop = True
+            self.programWorker.Stop()
+            self.usbWorker.Stop()
             self.programWorker.thread.join()
-            self.usbWorker.thread.join()
+            self.usbWorker.Join()
             UIMaster.Shutdown()
         else:
             event.ignore()
 
+    # The views are not updated while the window is hidden or minimized.
+    def showEvent(self, event):
+        super().showEvent(event)
+        UpdateDispatcher.Instance().SetPaused(self.isMinimized())
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        UpdateDispatcher.Instance().SetPaused(True)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            UpdateDispatcher.Instance().SetPaused(self.isMinimized() or not self.isVisible())
+
     def BuildMenu(self):
         menuBar = QMenuBar()
 
@@ -176,4 +200,11 @@ class MainWindow(QMainWindow):
         centerOnSelected = viewMenu.addAction("Center On Selection")
         centerOnSelected.triggered.connect(lambda: self.chipEditor.graphicsView.CenterOnSelection())
 
+        optionsMenu = menuBar.addMenu("&Options")
+        highResolutionAction = optionsMenu.addAction("High-Resolution Timing")
+        highResolutionAction.setCheckable(True)
+        highResolutionAction.toggled.connect(lambda x: self.programWorker.SetHighResolution(x))
+        latencyAction = optionsMenu.addAction("Latency Statistics...")
+        latencyAction.triggered.connect(self.ShowLatencyPanel)
+
         self.setMenuBar(menuBar)
@@ -1,9 +1,12 @@
 import threading
-import time
 import typing
 
 from UI.UIMaster import UIMaster
-from Data.ProgramCompilation import TickFunction, CompiledProgram
+from Data.ProgramCompilation import TickFunction, NextTickTime, CompiledProgram
+from Data.Scheduler import Scheduler, Now
+
+# In high-resolution mode, the worker busy-waits for deadlines that are closer than this.
+HIGH_RESOLUTION_SPIN_THRESHOLD = 0.002
 
 
 class ProgramWorker:
@@ -12,26 +15,46 @@ class ProgramWorker:
         self.tickStartProgram: typing.Optional[CompiledProgram] = None
         self.tickStartFunctionSymbol: str = ""
         self.timeout = timeout
+        self.scheduler = Scheduler.Instance()
+        self.highResolution = False
+
+        # Changes to the rig states (e.g. from the GUI) wake the worker so that they are flushed.
+        UIMaster.Instance().rig.dirtyListeners.append(self.scheduler.Wake)
+
         self.thread = threading.Thread(target=self.Loop, daemon=True)
         self.doStop = False
         self.thread.start()
 
+    # High-resolution timing spins near deadlines and keeps WaitForSeconds sequences locked to
+    # their deadlines, which allows fast pump rates at the cost of CPU time.
+    def SetHighResolution(self, highResolution: bool):
+        self.highResolution = highResolution
+        self.scheduler.spinThreshold = HIGH_RESOLUTION_SPIN_THRESHOLD if highResolution else 0.0
+
+    def Stop(self):
+        self.doStop = True
+        self.scheduler.Wake()
+
+    # Sleeps until a running function is due to be ticked (or the rig needs flushing), ticks the
+    # due functions, reschedules them and then flushes the rig states.
     def Loop(self):
         while not self.doStop:
-            currentTime = time.time()
+            dueFunctions = self.scheduler.WaitForDue()
+            currentTime = Now()
+            for compiledProgram, functionSymbol in dueFunctions:
+                self.tickStartProgram = compiledProgram
+                self.tickStartTime = Now()
+                self.tickStartFunctionSymbol = functionSymbol
+                TickFunction(compiledProgram, currentTime, functionSymbol, self.highResolution)
+                self.tickStartTime = None
+                nextTickTime = NextTickTime(compiledProgram, functionSymbol)
+                if nextTickTime is not None:
+                    self.scheduler.Schedule(compiledProgram, functionSymbol, nextTickTime)
             UIMaster.Instance().rig.FlushStates()
-            for x in UIMaster.GetCompiledPrograms().copy():
-                self.tickStartProgram = x
-                for s in x.asyncFunctions.copy():
-                    self.tickStartTime = time.time()
-                    self.tickStartFunctionSymbol = s
-                    TickFunction(x, currentTime, s)
-                    self.tickStartTime = None
-            time.sleep(0.01)
 
     def IsStuck(self):
         if self.tickStartTime is None or self.thread is None:
             return False
-        if time.time() - self.tickStartTime >= self.timeout:
-            self.tickStartTime = time.time()
+        if Now() - self.tickStartTime >= self.timeout:
+            self.tickStartTime = Now()
             return True
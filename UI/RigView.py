@@ -1,14 +1,18 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel, QPushButton, \
     QListWidget, QListWidgetItem, QSpinBox, QComboBox, QHBoxLayout, QSizePolicy
-from PySide6.QtCore import QTimer, QSize, Qt
+from PySide6.QtCore import QSize, Qt, Signal
 from typing import Optional, List
-from Data.Rig import Device
+from Data.Rig import Device, MAX_SOLENOIDS
 from UI.UIMaster import UIMaster
+from UI.UpdateDispatcher import UpdateDispatcher
 import time
 import math
 
 
 class RigView(QWidget):
+    # Emitted (from any thread) when the rig's devices or their connections change.
+    devicesChanged = Signal()
+
     def __init__(self):
         super().__init__()
 
@@ -19,6 +23,7 @@ class RigView(QWidget):
 
         self.solenoidsLayout = QGridLayout()
         self._lastNumbers = []
+        self.solenoidButtons: List[SolenoidButton] = []
 
         mainLayout.addWidget(QLabel("<b>Solenoid Control</b>"))
         mainLayout.addWidget(BorderSpacer(False))
@@ -74,9 +79,8 @@ class RigView(QWidget):
         self.selectedDevice: Optional[Device] = None
         self.lastDevicesList: List[Device] = []
 
-        self.updateTimer = QTimer(self)
-        self.updateTimer.timeout.connect(self.Update)
-        self.updateTimer.start(30)
+        self.devicesChanged.connect(self.Update)
+        UIMaster.Instance().rig.devicesChangedListeners.append(self.devicesChanged.emit)
 
         self.Update()
 
@@ -91,21 +95,24 @@ class RigView(QWidget):
         self.selectedDevice.polarities = [self.invertA.IsTrue(), self.invertB.IsTrue(),
                                           self.invertC.IsTrue()]
         self.selectedDevice.startNumber = self.startNumberBox.value()
+        rig = UIMaster.Instance().rig
         if self.selectedDevice.enabled and not self.selectedDevice.IsConnected():
-            self.selectedDevice.Connect()
+            rig.ConnectDevice(self.selectedDevice)
         elif not self.selectedDevice.enabled and self.selectedDevice.IsConnected():
-            self.selectedDevice.Disconnect()
-        UIMaster.Instance().rig.FlushStates()
+            rig.DisconnectDevice(self.selectedDevice)
+        rig.FlushStates()
         self.PushDeviceToUI()
+        self.UpdateSolenoids()
 
     def Blink(self):
+        states = bytearray(MAX_SOLENOIDS)
+        start = self.selectedDevice.startNumber
         for i in range(5):
-            state = (i % 2) == 0
-            self.selectedDevice.SetSolenoids({i: state for i in
-                                              range(self.selectedDevice.startNumber,
-                                                    self.selectedDevice.startNumber + 24)})
+            states[start:start + 24] = bytes([(i % 2) == 0]) * 24
+            self.selectedDevice.SetSolenoids(states)
             time.sleep(0.25)
-        UIMaster.Instance().rig.FlushStates()
+        # Restore the rig states, as the blink has changed what was last sent to the device.
+        self.selectedDevice.SetSolenoids(UIMaster.Instance().rig.solenoidStates)
 
     def PushDeviceToUI(self):
         [x.setEnabled(self.selectedDevice is not None) for x in
@@ -149,15 +156,21 @@ class RigView(QWidget):
             return
         self._lastNumbers = numbers
 
+        for button in self.solenoidButtons:
+            UpdateDispatcher.Instance().Unregister(button.UpdateDisplay)
         for i in reversed(range(self.solenoidsLayout.count())):
             w = self.solenoidsLayout.itemAt(i).widget()
             if w is not None:
                 w.deleteLater()
 
-        for i, n in enumerate(numbers):
+        self.solenoidButtons = [SolenoidButton(n) for n in numbers]
+        for i, button in enumerate(self.solenoidButtons):
             row = int(i / 8)
             column = i % 8
-            self.solenoidsLayout.addWidget(SolenoidButton(n), row, column)
+            self.solenoidsLayout.addWidget(button, row, column)
+            # Each button is only updated when its own solenoid changes.
+            UpdateDispatcher.Instance().Register(button.UpdateDisplay,
+                                                 lambda number=button.number: (number,))
 
         nRows = math.ceil(len(numbers) / 8)
         for rowNumber in range(nRows):
@@ -230,9 +243,6 @@ class SolenoidButton(QPushButton):
         self.number = n
         self.setText(str(n))
         self.clicked.connect(self.ToggleState)
-        self.checkTimer = QTimer(self)
-        self.checkTimer.timeout.connect(self.UpdateDisplay)
-        self.checkTimer.start(100)
 
         self._displayState = None
 
@@ -1,11 +1,14 @@
 from Data.Rig import Rig
 from Data.Chip import Chip, Program
 from Data.FileIO import SaveObject, LoadObject
+from Data.Scheduler import Scheduler
+from Data.ScriptWatcher import ScriptWatcher
 import Data.ProgramCompilation as ProgramCompilation
 from typing import Optional, List, Dict
 from pathlib import Path
 from PySide6.QtGui import QCursor, QGuiApplication
 from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QFileSystemWatcher
 
 
 class UIMaster:
@@ -29,6 +32,20 @@ class UIMaster:
         self.currentChipPath: Optional[Path] = None
         self.currentCursorShape: Optional[QCursor] = None
 
+        # Watches script files so that compiled programs know when they are out of date without
+        # checking the files themselves.
+        self.scriptFileWatcher = QFileSystemWatcher()
+        self.scriptFileWatcher.fileChanged.connect(self.OnScriptFileChanged)
+        ScriptWatcher.Instance().watchFunction = self.scriptFileWatcher.addPath
+
+    def OnScriptFileChanged(self, path: str):
+        ScriptWatcher.Instance().MarkChanged(path)
+        # Editors that save by replacing the file remove it from the watcher, so it is re-added.
+        # If the file is missing for now, ScriptWatcher tries again later.
+        if path not in self.scriptFileWatcher.files() and \
+                not (Path(path).exists() and self.scriptFileWatcher.addPath(path)):
+            ScriptWatcher.Instance().MarkUnwatched(path)
+
     @staticmethod
     def Shutdown():
         self = UIMaster.Instance()
@@ -49,6 +66,8 @@ class UIMaster:
         self = UIMaster.Instance()
         if program not in self._programLookup:
             return
+        Scheduler.Instance().UnscheduleProgram(self._programLookup[program])
+        ProgramCompilation.StopPatterns(self._programLookup[program])
         self._compiledPrograms.remove(self._programLookup[program])
         del self._programLookup[program]
 
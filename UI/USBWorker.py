@@ -1,15 +1,37 @@
 import threading
-import time
 from UI.UIMaster import UIMaster
+from Data.AsyncioBackend import AsyncioBackend
+
+# How often the serial ports are rescanned for devices that have been plugged in or removed.
+RESCAN_INTERVAL = 1.0
 
 
 class USBWorker:
     def __init__(self):
         self.thread = threading.Thread(target=self.Loop, daemon=True)
-        self.doStop = False
+        self.stopEvent = threading.Event()
         self.thread.start()
 
+    def Stop(self):
+        self.stopEvent.set()
+
+    def Join(self):
+        self.thread.join()
+
     def Loop(self):
-        while not self.doStop:
+        while not self.stopEvent.is_set():
             UIMaster.Instance().rig.RescanForDevices()
-            time.sleep(1)
+            self.stopEvent.wait(RESCAN_INTERVAL)
+
+
+# Rescans for devices from the asyncio backend's event loop rather than from a thread of its own.
+class AsyncioUSBWorker:
+    def __init__(self):
+        backend = AsyncioBackend.Instance()
+        self.future = backend.Run(backend.RescanLoop(UIMaster.Instance().rig, RESCAN_INTERVAL))
+
+    def Stop(self):
+        self.future.cancel()
+
+    def Join(self):
+        pass
@@ -0,0 +1,149 @@
+import time
+import traceback
+from typing import Callable, Dict, List, Optional, Iterable, Set
+
+from PySide6.QtCore import QTimer, QObject, Signal
+
+from UI.UIMaster import UIMaster
+
+# The dispatcher ticks at about 60 Hz.
+FRAME_INTERVAL_MS = 16
+
+
+# Runs the update functions of the UI from a single timer that ticks once per frame, instead of
+# each widget polling its model with its own timer. Each frame, only the functions that have been
+# marked dirty are called. A function is marked dirty when it is registered, when the chip changes
+# (see Chip.MarkChanged), when one of the solenoids it watches changes state, or every
+# [pollInterval] seconds for views of state that does not report its changes, such as running
+# programs.
+#
+# The dispatcher is paused while the main window is hidden, and everything is updated when it
+# resumes.
+class UpdateDispatcher(QObject):
+    # Emitted with each batch of solenoid changes that the rig reports, from the thread that
+    # flushed. The signal carries them over to the Qt thread.
+    solenoidsChanged = Signal(object)
+
+    _instance = None
+
+    def __init__(self):
+        super().__init__()
+        # Dictionaries are used as ordered sets, so that updates run in registration order.
+        self._registered: Dict[Callable[[], None], None] = {}
+        self._dirty: Dict[Callable[[], None], None] = {}
+
+        # Update function -> function returning the solenoid numbers that it shows.
+        self._solenoidWatchers: Dict[Callable[[], None], Callable[[], Iterable[int]]] = {}
+        # Solenoid number -> update functions that show it, and the reverse. These are refreshed
+        # when the chip changes, as that is when valves can be renumbered.
+        self._solenoidIndex: Dict[int, Dict[Callable[[], None], None]] = {}
+        self._indexedNumbers: Dict[Callable[[], None], Set[int]] = {}
+        # Solenoids that have changed since the last frame.
+        self._changedSolenoids: Set[int] = set()
+
+        # Update function -> [poll interval, next poll time].
+        self._polled: Dict[Callable[[], None], List[float]] = {}
+
+        # The chip and chip version that the views are up to date with.
+        self._chip = None
+        self._chipVersion: Optional[int] = None
+
+        self.solenoidsChanged.connect(self.OnSolenoidsChanged)
+        UIMaster.Instance().rig.solenoidsChangedListeners.append(self.solenoidsChanged.emit)
+
+        self.paused = False
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.Tick)
+        self.timer.start(FRAME_INTERVAL_MS)
+
+    @staticmethod
+    def Instance():
+        if UpdateDispatcher._instance is None:
+            UpdateDispatcher._instance = UpdateDispatcher()
+        return UpdateDispatcher._instance
+
+    def Register(self, updateFunction: Callable[[], None],
+                 watchedSolenoids: Optional[Callable[[], Iterable[int]]] = None,
+                 pollInterval: Optional[float] = None):
+        self._registered[updateFunction] = None
+        self._dirty[updateFunction] = None
+        if watchedSolenoids is not None:
+            self._solenoidWatchers[updateFunction] = watchedSolenoids
+            self.IndexWatcher(updateFunction)
+        if pollInterval is not None:
+            self._polled[updateFunction] = [pollInterval, time.monotonic() + pollInterval]
+
+    def Unregister(self, updateFunction: Callable[[], None]):
+        self._registered.pop(updateFunction, None)
+        self._dirty.pop(updateFunction, None)
+        self._solenoidWatchers.pop(updateFunction, None)
+        self.UnindexWatcher(updateFunction)
+        self._polled.pop(updateFunction, None)
+
+    # Updates the index with the solenoid numbers that [updateFunction] currently shows.
+    def IndexWatcher(self, updateFunction: Callable[[], None]):
+        self.UnindexWatcher(updateFunction)
+        numbers = set(self._solenoidWatchers[updateFunction]())
+        self._indexedNumbers[updateFunction] = numbers
+        for number in numbers:
+            self._solenoidIndex.setdefault(number, {})[updateFunction] = None
+
+    def UnindexWatcher(self, updateFunction: Callable[[], None]):
+        for number in self._indexedNumbers.pop(updateFunction, ()):
+            watchers = self._solenoidIndex[number]
+            watchers.pop(updateFunction, None)
+            if len(watchers) == 0:
+                del self._solenoidIndex[number]
+
+    def OnSolenoidsChanged(self, numbers: Set[int]):
+        self._changedSolenoids.update(numbers)
+
+    def MarkDirty(self, updateFunction: Callable[[], None]):
+        if updateFunction in self._registered:
+            self._dirty[updateFunction] = None
+
+    def MarkAllDirty(self):
+        self._dirty.update(self._registered)
+
+    def SetPaused(self, paused: bool):
+        if paused == self.paused:
+            return
+        self.paused = paused
+        if paused:
+            self.timer.stop()
+        else:
+            self._changedSolenoids.clear()
+            self.MarkAllDirty()
+            self.timer.start(FRAME_INTERVAL_MS)
+
+    def Tick(self):
+        chip = UIMaster.Instance().currentChip
+        if chip is not self._chip or chip.version != self._chipVersion:
+            self._chip = chip
+            self._chipVersion = chip.version
+            for updateFunction in self._solenoidWatchers:
+                self.IndexWatcher(updateFunction)
+            self.MarkAllDirty()
+
+        # Only the views of solenoids that changed are updated.
+        for number in self._changedSolenoids:
+            self._dirty.update(self._solenoidIndex.get(number, {}))
+        self._changedSolenoids.clear()
+
+        now = time.monotonic()
+        for updateFunction, poll in self._polled.items():
+            if now >= poll[1]:
+                poll[1] = now + poll[0]
+                self._dirty[updateFunction] = None
+
+        dirty = self._dirty
+        self._dirty = {}
+        for updateFunction in dirty:
+            # An earlier update may have removed this one (e.g. by deleting an item).
+            if updateFunction not in self._registered:
+                continue
+            try:
+                updateFunction()
+            except Exception:
+                # One failing view should not stop the others from updating.
+                traceback.print_exc()
@@ -1,12 +1,30 @@
+import collections
+
 from PySide6.QtGui import QFontMetrics, QFont
 from PySide6.QtCore import QSize
 
+# The number of autofit results that are kept. Older results are dropped.
+AUTOFIT_CACHE_CAPACITY = 4096
+
+# (font key, text, goal width, goal height) -> fitted pixel size, in least recently used order.
+_autofitCache = collections.OrderedDict()
+
 
 def ComputeAutofit(font: QFont, goalSize: QSize, text: str):
     font.setPixelSize(16)
-    metrics = QFontMetrics(font).boundingRect(text).size()
-    scaleFactorX = float(goalSize.width()) / metrics.width()
-    scaleFactorY = float(goalSize.height()) / metrics.height()
-    scale = min(scaleFactorX, scaleFactorY)
-    font.setPixelSize(round(16*scale))
+    # Measuring text is slow, so the fitted size is cached for each font, text and goal size.
+    key = (font.key(), text, goalSize.width(), goalSize.height())
+    pixelSize = _autofitCache.get(key)
+    if pixelSize is None:
+        metrics = QFontMetrics(font).boundingRect(text).size()
+        scaleFactorX = float(goalSize.width()) / metrics.width()
+        scaleFactorY = float(goalSize.height()) / metrics.height()
+        scale = min(scaleFactorX, scaleFactorY)
+        pixelSize = round(16 * scale)
+        _autofitCache[key] = pixelSize
+        if len(_autofitCache) > AUTOFIT_CACHE_CAPACITY:
+            _autofitCache.popitem(last=False)
+    else:
+        _autofitCache.move_to_end(key)
+    font.setPixelSize(pixelSize)
     return font
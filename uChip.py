@@ -1,9 +1,22 @@
 from PySide6 import QtWidgets
 from UI.MainWindow import MainWindow
 from UI.DebugWindow import DebugWindow
+from Data.AsyncioBackend import AsyncioBackend
+from Data.CodeCache import CodeCache
+from pathlib import Path
 import sys
 
 if __name__ == '__main__':
+    # Run the rig's serial I/O on an asyncio event loop (requires pyserial-asyncio).
+    if "--asyncio" in sys.argv:
+        AsyncioBackend.Install()
+    # Keep compiled scripts on disk, so that they are reused across sessions. The directory can be
+    # given as --code-cache=DIRECTORY.
+    for argument in sys.argv:
+        if argument == "--code-cache":
+            CodeCache.Instance().cacheDirectory = Path.home() / ".uChip" / "CodeCache"
+        elif argument.startswith("--code-cache="):
+            CodeCache.Instance().cacheDirectory = Path(argument[len("--code-cache="):])
     app = QtWidgets.QApplication(sys.argv)
     window = MainWindow()
 
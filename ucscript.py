@@ -38,6 +38,8 @@ class Parameter:
 # A Valve object should not be instantiated by itself. Valves can be retrieved by name with
 # FindValve(name), or passed through the GUI with Parameter(Valve).
 class Valve:
+    __slots__ = ()
+
     def SetOpen(self, state: bool):
         pass
 
@@ -215,6 +217,51 @@ def FindProgram(name: str) -> Program:
     pass
 
 
+# A valve timing table that has been compiled for playback. A ValvePattern should not be
+# instantiated by itself; patterns are created with CompileValvePattern().
+class ValvePattern:
+    def Play(self, repeat: bool = False):
+        pass
+
+    def Stop(self):
+        pass
+
+    def IsPlaying(self) -> bool:
+        pass
+
+
+# Compiles a valve timing table for playback on a dedicated timing thread, which switches valves
+# without running any script code. [rows] is a list of (time offset in seconds, bitmask) rows,
+# where bit i of the bitmask is the state of [valves][i]. [duration] is the length of one
+# repetition of the pattern, and is required to play it repeatedly.
+def CompileValvePattern(valves: typing.List[Valve], rows: typing.List[typing.Tuple[float, int]],
+                        duration: float = None) -> ValvePattern:
+    pass
+
+
+# Sets the states of several valves at once, e.g. SetValves({inlet: True, outlet: False}). The
+# changes are sent to the rig together.
+def SetValves(states: typing.Dict[Valve, bool]):
+    pass
+
+
+# Sets the [count] solenoids starting at solenoid number [start] to the bits of [mask], where bit
+# i is the state of solenoid start + i. The changes are sent to the rig together.
+def SetSolenoidMask(start: int, mask: int, count: int = 8):
+    pass
+
+
+# Valve changes made inside a 'with Atomic():' block are sent to the rig together when the block
+# ends. Yielding inside the block ends it early and logs an error, as no valve changes could be sent
+# meanwhile.
+class Atomic:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, excType, excValue, traceback):
+        pass
+
+
 # Logs text to the program output.
 def Log(text: str):
     pass